@@ -0,0 +1,52 @@
+# Declarative workflow definitions. Steps are "module:attribute" references that
+# services.registry.WorkflowRegistry imports only when a workflow is first used, so
+# importing this module stays cheap. Exposed as the "pycontext.workflows" entry point.
+WORKFLOWS = {
+    'ml-pipeline': {
+        'steps': [
+            'application.ml_workflows:data_preprocessing_step',
+            'application.ml_workflows:feature_engineering_step',
+            'application.ml_workflows:model_training_step',
+            'application.ml_workflows:model_evaluation_step',
+            'application.ml_workflows:model_deployment_step',
+        ],
+    },
+    'loan-processing': {
+        'steps': [
+            'application.financial_workflows:credit_data_collection_step',
+            'application.financial_workflows:risk_calculation_step',
+            'application.financial_workflows:compliance_check_step',
+            'application.financial_workflows:loan_decision_step',
+            'application.financial_workflows:notification_dispatch_step',
+        ],
+        'resources': ['notifications'],
+    },
+    'order-processing': {
+        'steps': [
+            'application.ecommerce_workflows:inventory_check_step',
+            'application.ecommerce_workflows:payment_processing_step',
+            'application.ecommerce_workflows:shipping_calculation_step',
+            'application.ecommerce_workflows:order_fulfillment_step',
+            'application.ecommerce_workflows:customer_notification_step',
+        ],
+        'resources': ['payments'],
+    },
+    'fraud-detection': {
+        'steps': [
+            'application.ecommerce_workflows:transaction_analysis_step',
+            'application.ecommerce_workflows:ml_fraud_scoring_step',
+            'application.ecommerce_workflows:manual_review_step',
+        ],
+        'resources': ['fraud_model'],
+    },
+    'medical-diagnosis': {
+        'steps': [
+            'application.healthcare_workflows:patient_data_ingestion_step',
+            'application.healthcare_workflows:symptom_analysis_step',
+            'application.healthcare_workflows:diagnostic_imaging_step',
+            'application.healthcare_workflows:treatment_recommendation_step',
+            'application.healthcare_workflows:prescription_generation_step',
+        ],
+        'resources': ['pharmacy'],
+    },
+}
\ No newline at end of file
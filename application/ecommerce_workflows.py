@@ -1,4 +1,5 @@
 from domain.entities import WorkflowContext
+from domain.steps import step
 from .utils import generate_deterministic_id, validate_numeric_input
 
 # E-commerce Order Processing Pipeline
@@ -10,17 +11,28 @@ def inventory_check_step(context: WorkflowContext) -> WorkflowContext:
     context.data['warehouse_location'] = 'US_EAST'
     return context
 
-def payment_processing_step(context: WorkflowContext) -> WorkflowContext:
+async def payment_processing_step(context: WorkflowContext) -> WorkflowContext:
     """Process customer payment and handle transactions"""
     payment_method = context.request.get('payment_method', 'credit_card')
     amount = validate_numeric_input(context.request.get('total_amount', 0), 'total_amount')
     
+    if context.resources and 'payments' in context.resources:
+        async with context.resources.acquire('payments') as gateway:
+            # Preemption can cancel the call and the step reruns on resume; the key makes
+            # the gateway return the original charge instead of charging again
+            charge = await gateway.call('charge', amount=amount, method=payment_method,
+                                        idempotency_key=context.id)
+        transaction_id = charge['transaction_id']
+    else:
+        transaction_id = generate_deterministic_id(f'{amount}_{payment_method}', 'txn_')
+    
     context.data['payment_processed'] = True
-    context.data['transaction_id'] = generate_deterministic_id(f'{amount}_{payment_method}', 'txn_')
+    context.data['transaction_id'] = transaction_id
     context.data['payment_status'] = 'completed'
     context.data['charged_amount'] = amount
     return context
 
+@step(cheap=True)
 def shipping_calculation_step(context: WorkflowContext) -> WorkflowContext:
     """Calculate shipping costs and delivery estimates"""
     shipping_address = context.request.get('shipping_address', {})
@@ -30,6 +42,7 @@ def shipping_calculation_step(context: WorkflowContext) -> WorkflowContext:
     context.data['tracking_number'] = generate_deterministic_id(str(shipping_address), 'FX')
     return context
 
+@step(cheap=True)
 def order_fulfillment_step(context: WorkflowContext) -> WorkflowContext:
     """Prepare order for shipment and generate labels"""
     context.data['picking_list_generated'] = True
@@ -47,6 +60,7 @@ def customer_notification_step(context: WorkflowContext) -> WorkflowContext:
     return context
 
 # Fraud Detection Pipeline
+@step(cheap=True)
 def transaction_analysis_step(context: WorkflowContext) -> WorkflowContext:
     """Analyze transaction patterns for fraud indicators"""
     amount = context.request.get('total_amount', 0)
@@ -57,10 +71,16 @@ def transaction_analysis_step(context: WorkflowContext) -> WorkflowContext:
     context.data['geo_location_match'] = True
     return context
 
-def ml_fraud_scoring_step(context: WorkflowContext) -> WorkflowContext:
+@step(idempotent=True, hedge_quantile=0.95)
+async def ml_fraud_scoring_step(context: WorkflowContext) -> WorkflowContext:
     """Apply ML models for fraud detection"""
     transaction_score = context.data.get('transaction_score', 0.5)
-    context.data['ml_fraud_score'] = transaction_score * 0.9
+    if context.resources and 'fraud_model' in context.resources:
+        async with context.resources.acquire('fraud_model') as model:
+            scored = await model.call('score', transaction_score=transaction_score)
+        context.data['ml_fraud_score'] = scored['score']
+    else:
+        context.data['ml_fraud_score'] = transaction_score * 0.9
     context.data['fraud_probability'] = 'low' if transaction_score > 0.7 else 'high'
     context.data['model_version'] = 'fraud_detector_v2.1'
     return context
@@ -1,4 +1,5 @@
 from domain.entities import WorkflowContext
+from domain.steps import step
 
 # Financial Risk Assessment Pipeline
 def credit_data_collection_step(context: WorkflowContext) -> WorkflowContext:
@@ -10,6 +11,7 @@ def credit_data_collection_step(context: WorkflowContext) -> WorkflowContext:
     context.data['debt_to_income'] = 0.3
     return context
 
+@step(cheap=True)
 def risk_calculation_step(context: WorkflowContext) -> WorkflowContext:
     """Calculate risk scores using financial algorithms"""
     credit_score = context.data.get('credit_score', 600)
@@ -21,6 +23,7 @@ def risk_calculation_step(context: WorkflowContext) -> WorkflowContext:
     context.data['risk_category'] = 'low' if risk_score > 0.7 else 'medium' if risk_score > 0.4 else 'high'
     return context
 
+@step(cheap=True)
 def compliance_check_step(context: WorkflowContext) -> WorkflowContext:
     """Verify regulatory compliance and KYC"""
     context.data['kyc_verified'] = True
@@ -29,6 +32,7 @@ def compliance_check_step(context: WorkflowContext) -> WorkflowContext:
     context.data['compliance_status'] = 'approved'
     return context
 
+@step(cheap=True)
 def loan_decision_step(context: WorkflowContext) -> WorkflowContext:
     """Make final loan approval decision"""
     risk_category = context.data.get('risk_category', 'high')
@@ -44,9 +48,14 @@ def loan_decision_step(context: WorkflowContext) -> WorkflowContext:
     
     return context
 
-def notification_dispatch_step(context: WorkflowContext) -> WorkflowContext:
+async def notification_dispatch_step(context: WorkflowContext) -> WorkflowContext:
     """Send decision notification to customer"""
     decision = context.data.get('loan_decision', 'pending')
+    if context.resources and 'notifications' in context.resources:
+        async with context.resources.acquire('notifications') as notifier:
+            # Redone on resume after preemption; the key stops a duplicate notification
+            await notifier.call('notify', customer_id=context.request.get('customer_id'),
+                                decision=decision, idempotency_key=context.id)
     context.data['notification_sent'] = True
     context.data['notification_method'] = 'email_sms'
     context.data['customer_notified_at'] = 'now'
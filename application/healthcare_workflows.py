@@ -1,4 +1,5 @@
 from domain.entities import WorkflowContext
+from domain.steps import MapStep, step
 
 # Medical Diagnosis Pipeline
 def patient_data_ingestion_step(context: WorkflowContext) -> WorkflowContext:
@@ -10,6 +11,7 @@ def patient_data_ingestion_step(context: WorkflowContext) -> WorkflowContext:
     context.data['patient_consent'] = True
     return context
 
+@step(cheap=True)
 def symptom_analysis_step(context: WorkflowContext) -> WorkflowContext:
     """Analyze reported symptoms and medical history"""
     symptoms = context.request.get('symptoms', [])
@@ -28,6 +30,7 @@ def diagnostic_imaging_step(context: WorkflowContext) -> WorkflowContext:
     context.data['imaging_report_id'] = f'IMG_{hash(imaging_type)}'
     return context
 
+@step(cheap=True)
 def treatment_recommendation_step(context: WorkflowContext) -> WorkflowContext:
     """Generate treatment recommendations based on diagnosis"""
     diagnosis = context.data.get('differential_diagnosis', [])
@@ -37,16 +40,24 @@ def treatment_recommendation_step(context: WorkflowContext) -> WorkflowContext:
     context.data['follow_up_timeline'] = '2_weeks'
     return context
 
-def prescription_generation_step(context: WorkflowContext) -> WorkflowContext:
+async def prescription_generation_step(context: WorkflowContext) -> WorkflowContext:
     """Generate electronic prescriptions and send to pharmacy"""
     medications = context.data.get('medication_list', [])
-    context.data['prescription_id'] = f'RX_{hash(str(medications))}'
+    if context.resources and 'pharmacy' in context.resources:
+        async with context.resources.acquire('pharmacy') as pharmacy:
+            # Redone on resume after preemption; the key stops a second prescription
+            prescription = await pharmacy.call('prescribe', medications=medications,
+                                               idempotency_key=context.id)
+        context.data['prescription_id'] = prescription['prescription_id']
+    else:
+        context.data['prescription_id'] = f'RX_{hash(str(medications))}'
     context.data['pharmacy_notified'] = True
     context.data['drug_interaction_check'] = 'passed'
     context.data['insurance_verification'] = 'approved'
     return context
 
 # Clinical Trial Enrollment Pipeline
+@step(cheap=True)
 def eligibility_screening_step(context: WorkflowContext) -> WorkflowContext:
     """Screen patient eligibility for clinical trials"""
     age = context.request.get('age', 0)
@@ -58,6 +69,7 @@ def eligibility_screening_step(context: WorkflowContext) -> WorkflowContext:
     context.data['preliminary_eligible'] = context.data['age_eligible'] and context.data['condition_match']
     return context
 
+@step(cheap=True)
 def informed_consent_step(context: WorkflowContext) -> WorkflowContext:
     """Process informed consent documentation"""
     context.data['consent_form_provided'] = True
@@ -84,4 +96,21 @@ def randomization_step(context: WorkflowContext) -> WorkflowContext:
     context.data['treatment_group'] = treatment_group
     context.data['study_drug_assigned'] = f'drug_{treatment_group}'
     context.data['randomization_date'] = 'today'
-    return context
\ No newline at end of file
+    return context
+
+def cohort_summary_step(context: WorkflowContext, results) -> WorkflowContext:
+    """Aggregate per-patient screening results for a clinical trial cohort"""
+    eligible = [result for result in results if result.get('preliminary_eligible')]
+    context.data['patients_screened'] = len(results)
+    context.data['patients_eligible'] = len(eligible)
+    context.data['cohort_status'] = 'ready' if eligible else 'insufficient'
+    return context
+
+# Screens every patient in request['patients'] as its own child workflow
+cohort_screening_step = MapStep(
+    name='cohort_screening_step',
+    items=lambda context: context.request.get('patients', []),
+    steps=[eligibility_screening_step],
+    reduce=cohort_summary_step,
+    max_concurrency=8,
+)
\ No newline at end of file
@@ -1,4 +1,7 @@
+import random
+from typing import Any, AsyncIterator, Dict, List
 from domain.entities import WorkflowContext
+from domain.steps import StreamStep
 
 # Machine Learning Pipeline
 def data_preprocessing_step(context: WorkflowContext) -> WorkflowContext:
@@ -37,4 +40,38 @@ def model_deployment_step(context: WorkflowContext) -> WorkflowContext:
     model_id = context.data.get('trained_model', 'unknown')
     context.data['deployment_endpoint'] = f'/api/predict/{model_id}'
     context.data['deployment_status'] = 'active'
-    return context
\ No newline at end of file
+    return context
+
+# Streaming preprocessing for datasets larger than memory
+async def dataset_chunks(context: WorkflowContext, offset: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield the dataset in chunks of rows, starting at chunk offset"""
+    sample_count = context.request.get('sample_count', 10000)
+    chunk_size = context.request.get('chunk_size', 1000)
+    for start in range(offset * chunk_size, sample_count, chunk_size):
+        rng = random.Random(f"{context.request.get('dataset', 'default')}:{start}")
+        yield [{'amount': rng.uniform(0, 500), 'tenure': rng.choice([None, rng.randint(1, 120)])}
+               for _ in range(min(chunk_size, sample_count - start))]
+
+def clean_chunk(context: WorkflowContext, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop rows with missing values"""
+    return [row for row in rows if row['tenure'] is not None]
+
+def scale_chunk(context: WorkflowContext, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Scale features into comparable ranges"""
+    return [{'amount': row['amount'] / 500, 'tenure': row['tenure'] / 120} for row in rows]
+
+def accumulate_dataset_stats(context: WorkflowContext, rows: List[Dict[str, Any]]):
+    """Fold a processed chunk into running dataset statistics"""
+    data = context.data
+    data['sample_count'] = data.get('sample_count', 0) + len(rows)
+    data['amount_total'] = data.get('amount_total', 0.0) + sum(row['amount'] for row in rows)
+    data['chunks_processed'] = data.get('chunks_processed', 0) + 1
+    data['feature_count'] = len(rows[0]) if rows else data.get('feature_count', 0)
+    data['preprocessed_data'] = f"{context.request.get('dataset', 'default')}_cleaned"
+
+streaming_preprocessing_step = StreamStep(
+    name='streaming_preprocessing_step',
+    source=dataset_chunks,
+    stages=[clean_chunk, scale_chunk],
+    sink=accumulate_dataset_stats,
+)
\ No newline at end of file
@@ -1,4 +1,5 @@
 from domain.entities import WorkflowContext
+from domain.steps import step
 
 def data_extraction_step(context: WorkflowContext) -> WorkflowContext:
     """Extract data from source systems"""
@@ -7,6 +8,7 @@ def data_extraction_step(context: WorkflowContext) -> WorkflowContext:
     context.data['extraction_status'] = 'completed'
     return context
 
+@step(cheap=True)
 def data_transformation_step(context: WorkflowContext) -> WorkflowContext:
     """Transform and validate extracted data"""
     raw_data = context.data.get('extracted_data', '')
@@ -14,6 +16,7 @@ def data_transformation_step(context: WorkflowContext) -> WorkflowContext:
     context.data['validation_passed'] = True
     return context
 
+@step(cheap=True)
 def data_enrichment_step(context: WorkflowContext) -> WorkflowContext:
     """Enrich data with additional information"""
     context.data['enriched_data'] = context.data.get('transformed_data', '') + '_ENRICHED'
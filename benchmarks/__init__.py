@@ -0,0 +1 @@
+# Benchmarks - Engine and queue overhead measurements
\ No newline at end of file
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RUNS = 20
+BOOT = time.perf_counter()  # Interpreter is up; the worker's own imports and setup start here
+
+async def eager(db_path: str, spawned: float) -> dict:
+    """Start the way examples used to: import every step module and configure every engine"""
+    from domain.entities import Priority, WorkflowContext, WorkflowMessage
+    from infrastructure.persistence import SQLiteCheckpointRepository
+    from services.message_queue import WorkflowMessageQueue
+    from services.registry import resolve
+    from services.workflow_engine import WorkflowEngine
+    from application.definitions import WORKFLOWS
+
+    checkpoint_repo = SQLiteCheckpointRepository(db_path)
+    checkpoint_repo._init_db()  # Synchronous DDL, as the constructor used to run it
+    mq = WorkflowMessageQueue(checkpoint_repo=checkpoint_repo)
+    for name, spec in WORKFLOWS.items():
+        engine = WorkflowEngine(checkpoint_repo)
+        engine.configure(name, [resolve(ref) for ref in spec['steps']])
+        mq.register_workflow(name, engine)
+    return await first_workflow(mq, spawned, Priority, WorkflowContext, WorkflowMessage)
+
+async def lazy(db_path: str, spawned: float) -> dict:
+    """Declarative registry: step modules load when their workflow first runs"""
+    from domain.entities import Priority, WorkflowContext, WorkflowMessage
+    from infrastructure.persistence import SQLiteCheckpointRepository
+    from services.message_queue import WorkflowMessageQueue
+    from services.registry import WorkflowRegistry
+    from application.definitions import WORKFLOWS
+
+    checkpoint_repo = SQLiteCheckpointRepository(db_path)
+    registry = WorkflowRegistry(checkpoint_repo).load(WORKFLOWS)
+    await registry.warm_up()
+    mq = WorkflowMessageQueue(checkpoint_repo=checkpoint_repo, registry=registry)
+    return await first_workflow(mq, spawned, Priority, WorkflowContext, WorkflowMessage)
+
+async def first_workflow(mq, spawned: float, Priority, WorkflowContext, WorkflowMessage) -> dict:
+    ready = time.time() - spawned
+    booted = time.perf_counter() - BOOT
+    consumer_task = asyncio.create_task(mq.start_consumer())
+    handle = await mq.publish(WorkflowMessage(
+        priority=Priority.HIGH, workflow_name='fraud-detection',
+        context=WorkflowContext.create(request={'total_amount': 5000})
+    ))
+    await handle
+    first = time.time() - spawned
+    mq.stop()
+    await consumer_task
+    return {'ready': ready, 'boot': booted, 'first': first, 'modules': len(sys.modules)}
+
+def spawn(mode: str) -> dict:
+    with tempfile.TemporaryDirectory() as work_dir:
+        spawned = time.time()
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', mode,
+             '--db', os.path.join(work_dir, 'cold.db'), '--spawned', repr(spawned)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output)
+        result['exit'] = time.time() - spawned
+        return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure worker cold start, eager vs lazy registry")
+    parser.add_argument('--child', choices=['eager', 'lazy'])
+    parser.add_argument('--db')
+    parser.add_argument('--spawned', type=float)
+    parser.add_argument('--runs', type=int, default=RUNS)
+    args = parser.parse_args(argv)
+    if args.child:
+        run = eager if args.child == 'eager' else lazy
+        print(json.dumps(asyncio.run(run(args.db, args.spawned))))
+        return
+
+    results = {'eager': [], 'lazy': []}
+    for _ in range(args.runs):  # Interleaved so machine noise hits both modes alike
+        for mode in results:
+            results[mode].append(spawn(mode))
+
+    print(f"Worker cold start, median of {args.runs} spawns per mode")
+    for mode, runs in results.items():
+        median = {key: statistics.median(r[key] for r in runs) * 1000
+                  for key in ('boot', 'ready', 'first', 'exit')}
+        print(f"  {mode:<6} setup {median['boot']:6.1f}ms  ready {median['ready']:6.1f}ms  "
+              f"first workflow done {median['first']:6.1f}ms  exit {median['exit']:6.1f}ms  "
+              f"modules {runs[0]['modules']}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.entities import WorkflowContext
+from infrastructure.persistence import SQLiteCheckpointRepository
+from services.workflow_engine import WorkflowEngine
+from services.structured_logging import StructuredFormatter, start_background_logging
+from services.registry import resolve
+from application.definitions import WORKFLOWS as DEFINITIONS
+
+WORKFLOWS = 2000
+
+def noop_step(context: WorkflowContext) -> WorkflowContext:
+    context.data['noop'] = True
+    return context
+
+STEPS = [noop_step] * 5
+
+PIPELINES = {name: [resolve(ref) for ref in spec['steps']] for name, spec in DEFINITIONS.items()}
+PIPELINE_RUNS = 200
+FUSION_ROUNDS = 10
+REQUEST = {
+    'items': ['laptop', 'mouse'], 'total_amount': 1200, 'customer_id': 'C1',
+    'patient_id': 'P1', 'symptoms': ['cough'], 'dataset': 'churn'
+}
+
+async def run_workflows(engine: WorkflowEngine, logger) -> float:
+    """Return mean engine overhead per step in microseconds"""
+    started = time.perf_counter()
+    for _ in range(WORKFLOWS):
+        await engine.execute(WorkflowContext.create(logger=logger))
+    return (time.perf_counter() - started) / (WORKFLOWS * len(engine.steps)) * 1e6
+
+class SlowHandler(logging.Handler):
+    """Stand-in for a network handler with a fixed per-record round trip"""
+
+    def emit(self, record: logging.LogRecord):
+        self.format(record)
+        time.sleep(0.0002)
+
+def make_logger(name: str, level: int, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False
+    handler.setFormatter(StructuredFormatter())
+    logger.addHandler(handler)
+    return logger
+
+async def benchmark_logging(log_dir: str):
+    engine = WorkflowEngine()
+    engine.configure('benchmark', STEPS)
+
+    results = {'no logger': await run_workflows(engine, None)}
+
+    disabled = make_logger('bench.disabled', logging.WARNING,
+                           logging.FileHandler(os.path.join(log_dir, 'disabled.log')))
+    results['logger, INFO disabled'] = await run_workflows(engine, disabled)
+
+    sync = make_logger('bench.file', logging.INFO,
+                       logging.FileHandler(os.path.join(log_dir, 'sync.log')))
+    results['file handler on loop'] = await run_workflows(engine, sync)
+
+    background = make_logger('bench.file.background', logging.INFO,
+                             logging.FileHandler(os.path.join(log_dir, 'background.log')))
+    listener = start_background_logging(background)
+    results['file handler, background thread'] = await run_workflows(engine, background)
+    listener.stop()
+
+    slow = make_logger('bench.slow', logging.INFO, SlowHandler())
+    results['200us handler on loop'] = await run_workflows(engine, slow)
+
+    slow_background = make_logger('bench.slow.background', logging.INFO, SlowHandler())
+    listener = start_background_logging(slow_background, maxsize=100000)
+    results['200us handler, background thread'] = await run_workflows(engine, slow_background)
+    listener.stop()
+
+    baseline = results['no logger']
+    print(f"Logging overhead ({WORKFLOWS} workflows x {len(STEPS)} steps)")
+    for name, per_step in results.items():
+        print(f"  {name:<34} {per_step:8.2f} us/step  (+{per_step - baseline:.2f})")
+
+async def time_pipeline(engine: WorkflowEngine, runs: int) -> float:
+    """Return total wall time of runs workflows in seconds"""
+    started = time.perf_counter()
+    for _ in range(runs):
+        await engine.execute(WorkflowContext.create(request=dict(REQUEST)))
+    return time.perf_counter() - started
+
+async def benchmark_fusion(db_dir: str):
+    print(f"\nExecution plan fusion ({PIPELINE_RUNS} runs per pipeline, SQLite checkpoints)")
+    for name, steps in PIPELINES.items():
+        engines = {}
+        for fuse in (False, True):  # Separate databases so neither mode inherits the other's file
+            engine = WorkflowEngine(SQLiteCheckpointRepository(
+                os.path.join(db_dir, f"fusion-{name}-{'fused' if fuse else 'unfused'}.db")))
+            engine.configure(name, steps, fuse=fuse)
+            await time_pipeline(engine, PIPELINE_RUNS // 10)  # Warm up
+            engines[fuse] = engine
+        if len(engines[True].plan) == len(engines[False].plan):
+            print(f"  {name:<18} {len(engines[False].plan)} units, no cheap steps to fuse (skipped)")
+            continue
+        elapsed = {False: 0.0, True: 0.0}
+        for round_index in range(FUSION_ROUNDS):  # Interleaved, alternating which mode goes first
+            order = (False, True) if round_index % 2 == 0 else (True, False)
+            for fuse in order:
+                elapsed[fuse] += await time_pipeline(engines[fuse], PIPELINE_RUNS // FUSION_ROUNDS)
+        unfused, fused = (elapsed[fuse] / PIPELINE_RUNS * 1e6 for fuse in (False, True))
+        print(f"  {name:<18} {len(engines[False].plan)} units {unfused:9.1f} us -> "
+              f"{len(engines[True].plan)} units {fused:9.1f} us  ({(1 - fused / unfused) * 100:5.1f}% less)")
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        asyncio.run(benchmark_logging(work_dir))
+        asyncio.run(benchmark_fusion(work_dir))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from infrastructure.persistence import SQLiteCheckpointRepository
+from services.message_queue import WorkflowMessageQueue, SchedulingPolicy
+from services.traffic import (
+    TrafficRecorder, generate_bursty, generate_poisson, load_traffic, run_load
+)
+from services.registry import WorkflowRegistry
+from application.definitions import WORKFLOWS
+
+def build_queue(db_path: str, args: argparse.Namespace) -> WorkflowMessageQueue:
+    checkpoint_repo = SQLiteCheckpointRepository(db_path)
+    registry = WorkflowRegistry(checkpoint_repo).load(WORKFLOWS)
+    for definition in registry.definitions.values():
+        definition.step_delay = args.step_delay
+    return WorkflowMessageQueue(preemptive=args.preemptive, checkpoint_repo=checkpoint_repo,
+                                scheduling=SchedulingPolicy(args.scheduling), registry=registry)
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Record, replay or synthesize workflow traffic")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--replay', metavar='FILE', help="Replay a recorded traffic file")
+    source.add_argument('--pattern', choices=['poisson', 'bursty'], help="Generate synthetic traffic")
+    parser.add_argument('--rate', type=float, default=50.0, help="Mean arrivals per second")
+    parser.add_argument('--burst-rate', type=float, default=200.0)
+    parser.add_argument('--burst-length', type=float, default=1.0, help="Seconds per burst")
+    parser.add_argument('--period', type=float, default=5.0, help="Seconds between burst starts")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds of traffic")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed-up factor")
+    parser.add_argument('--record', metavar='FILE', help="Record the published stream to FILE")
+    parser.add_argument('--step-delay', type=float, default=0.002, help="Simulated seconds per step")
+    parser.add_argument('--scheduling', choices=[p.value for p in SchedulingPolicy], default='priority')
+    parser.add_argument('--preemptive', action='store_true')
+    return parser.parse_args(argv)
+
+async def run(args: argparse.Namespace):
+    if args.replay:
+        records = load_traffic(args.replay)
+    elif args.pattern == 'poisson':
+        records = generate_poisson(args.rate, args.duration, seed=args.seed)
+    else:
+        records = generate_bursty(args.rate, args.duration, args.burst_rate, args.burst_length,
+                                  args.period, seed=args.seed)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        mq = build_queue(os.path.join(work_dir, 'load.db'), args)
+        await mq.registry.warm_up(import_steps=True)  # Keep first-use imports out of the latencies
+        if args.record:
+            mq.recorder = TrafficRecorder(args.record)
+        try:
+            report = await run_load(mq, records, speed=args.speed)
+        finally:
+            if mq.recorder:
+                mq.recorder.close()
+    print(report.format())
+
+def main(argv=None):
+    asyncio.run(run(parse_args(argv)))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
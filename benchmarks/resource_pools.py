@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.entities import WorkflowContext
+from infrastructure.gateways import JsonLineClient
+from services.resources import ResourceRegistry
+from services.workflow_engine import WorkflowEngine
+from application.ecommerce_workflows import inventory_check_step, payment_processing_step
+
+ORDERS = 500
+CONCURRENCY = 50
+SETUP_DELAY = 0.005  # Simulated handshake/authentication per new connection
+CALL_DELAY = 0.001
+
+charges = {}  # idempotency_key -> transaction_id
+
+async def handle_gateway(reader, writer):
+    await asyncio.sleep(SETUP_DELAY)
+    while line := await reader.readline():
+        request = json.loads(line)
+        transaction_id = charges.setdefault(request.get('idempotency_key'), f"txn_{request.get('amount')}")
+        await asyncio.sleep(CALL_DELAY)
+        writer.write(json.dumps({'ok': True, 'transaction_id': transaction_id}).encode() + b'\n')
+        await writer.drain()
+    writer.close()
+
+class ConnectPerCall:
+    """Registry stand-in that opens a fresh client for every acquire, as steps would without pooling"""
+
+    def __init__(self, port: int):
+        self.port = port
+
+    def __contains__(self, name: str) -> bool:
+        return True
+
+    @asynccontextmanager
+    async def acquire(self, name: str):
+        client = await JsonLineClient.connect('127.0.0.1', self.port)
+        try:
+            yield client
+        finally:
+            await client.close()
+
+async def run_orders(resources) -> float:
+    engine = WorkflowEngine(resources=resources)
+    engine.configure('order-processing', [inventory_check_step, payment_processing_step])
+    limit = asyncio.Semaphore(CONCURRENCY)
+
+    async def order(n: int):
+        async with limit:
+            await engine.execute(WorkflowContext.create(request={'total_amount': n, 'items': ['book']}))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(order(n) for n in range(ORDERS)))
+    return ORDERS / (time.perf_counter() - started)
+
+async def benchmark():
+    server = await asyncio.start_server(handle_gateway, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+
+    per_call = await run_orders(ConnectPerCall(port))
+
+    async with ResourceRegistry() as resources:
+        resources.register('payments', lambda: JsonLineClient.connect('127.0.0.1', port),
+                           max_size=CONCURRENCY, close=JsonLineClient.close)
+        pooled = await run_orders(resources)
+        stats = resources.snapshot()['payments']
+
+    server.close()
+    await server.wait_closed()
+    print(f"Order workflows calling a payment gateway ({ORDERS} orders, {CONCURRENCY} concurrent, "
+          f"{SETUP_DELAY * 1000:.0f}ms connection setup, {CALL_DELAY * 1000:.0f}ms per call)")
+    print(f"  connection per call  {per_call:8.1f} orders/s")
+    print(f"  pooled               {pooled:8.1f} orders/s  "
+          f"({stats['created']} connections, {stats['reused']} reuses)")
+
+def main():
+    asyncio.run(benchmark())
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
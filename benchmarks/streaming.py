@@ -0,0 +1,61 @@
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import replace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.entities import WorkflowContext
+from services.workflow_engine import WorkflowEngine
+from application.ml_workflows import (
+    accumulate_dataset_stats, clean_chunk, dataset_chunks, scale_chunk, streaming_preprocessing_step
+)
+
+SAMPLE_COUNTS = [20000, 100000, 400000]
+CHUNK_SIZE = 1000
+
+def first_result_probe(started: float, seen: dict):
+    def sink(context, rows):
+        seen.setdefault('first', time.perf_counter() - started)
+        accumulate_dataset_stats(context, rows)
+    return sink
+
+async def materialized(sample_count: int):
+    """Load the whole dataset into context.data, then run each stage over all of it"""
+    context = WorkflowContext.create(request={'sample_count': sample_count, 'chunk_size': CHUNK_SIZE})
+    started, seen = time.perf_counter(), {}
+    rows = [row async for chunk in dataset_chunks(context, 0) for row in chunk]
+    context.data['rows'] = rows
+    rows = scale_chunk(context, clean_chunk(context, rows))
+    first_result_probe(started, seen)(context, rows)
+    return seen['first'], time.perf_counter() - started
+
+async def streamed(sample_count: int):
+    context = WorkflowContext.create(request={'sample_count': sample_count, 'chunk_size': CHUNK_SIZE})
+    started, seen = time.perf_counter(), {}
+    engine = WorkflowEngine()
+    engine.configure('ml-streaming', [replace(streaming_preprocessing_step,
+                                              sink=first_result_probe(started, seen))])
+    await engine.execute(context)
+    return seen['first'], time.perf_counter() - started
+
+def measure(run, sample_count: int):
+    first, total = asyncio.run(run(sample_count))
+    # Memory is traced in a separate run since tracemalloc distorts timings
+    tracemalloc.start()
+    asyncio.run(run(sample_count))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first, total, peak
+
+def main():
+    print(f"Preprocessing synthetic datasets in chunks of {CHUNK_SIZE} rows")
+    for sample_count in SAMPLE_COUNTS:
+        for label, run in (('materialized', materialized), ('streamed', streamed)):
+            first, total, peak = measure(run, sample_count)
+            print(f"  {sample_count:>7} rows  {label:<12} peak {peak / 2**20:7.1f} MiB  "
+                  f"first result {first * 1000:8.1f}ms  total {total * 1000:8.1f}ms")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
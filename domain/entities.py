@@ -1,7 +1,9 @@
-from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from dataclasses import dataclass, field
+from typing import Dict, Any, MutableMapping, Optional
 from enum import Enum
+import time
 import uuid
+from .persistent_map import WorkflowData
 
 class WorkflowState(Enum):
     PENDING = "pending"
@@ -18,9 +20,14 @@ class Priority(Enum):
 @dataclass
 class WorkflowContext:
     id: str
-    data: Dict[str, Any]
+    data: MutableMapping[str, Any]  # Backed by WorkflowData for O(1) checkpoint snapshots
     request: Optional[Dict[str, Any]] = None
     logger: Optional[Any] = None
+    resources: Optional[Any] = field(default=None, repr=False, compare=False)  # Shared client pools; never checkpointed
+    
+    def __post_init__(self):
+        if not isinstance(self.data, WorkflowData):
+            self.data = WorkflowData(self.data)
     
     @classmethod
     def create(cls, **kwargs):
@@ -39,6 +46,26 @@ class WorkflowMessage:
     priority: Priority
     workflow_name: str
     context: WorkflowContext
+    deadline: Optional[float] = None  # Absolute time.monotonic() timestamp
+    numeric_priority: Optional[float] = None  # Finer ordering; lower runs first
+    late: bool = field(default=False, compare=False)
+    profile: bool = False  # Request per-step profiling for this message
+    enqueued_at: Optional[float] = field(default=None, compare=False)
+    
+    @classmethod
+    def with_timeout(cls, timeout: float, **kwargs):
+        return cls(deadline=time.monotonic() + timeout, **kwargs)
+    
+    @property
+    def effective_priority(self) -> float:
+        if self.numeric_priority is not None:
+            return self.numeric_priority
+        return self.priority.value
+    
+    def time_remaining(self, now: Optional[float] = None) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - (time.monotonic() if now is None else now)
     
     def __lt__(self, other):
         return self.priority.value < other.priority.value
\ No newline at end of file
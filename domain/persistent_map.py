@@ -0,0 +1,245 @@
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Iterator, List, Optional, Tuple
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+_HASH_MASK = (1 << _HASH_BITS) - 1
+_MISSING = object()
+
+def _popcount(value: int) -> int:
+    return bin(value).count('1')
+
+class _Leaf:
+    __slots__ = ('hash', 'key', 'value')
+
+    def __init__(self, hash_: int, key: Any, value: Any):
+        self.hash = hash_
+        self.key = key
+        self.value = value
+
+    def matches(self, hash_: int, key: Any) -> bool:
+        return self.hash == hash_ and (self.key is key or self.key == key)
+
+def _merge(shift: int, first: _Leaf, second: _Leaf):
+    """Build the smallest subtree holding two leaves with different keys"""
+    if shift >= _HASH_BITS or first.hash == second.hash:
+        return _CollisionNode(first.hash, [first, second])
+    first_bit = 1 << ((first.hash >> shift) & _MASK)
+    second_bit = 1 << ((second.hash >> shift) & _MASK)
+    if first_bit == second_bit:
+        return _BitmapNode(first_bit, [_merge(shift + _BITS, first, second)])
+    if first_bit < second_bit:
+        return _BitmapNode(first_bit | second_bit, [first, second])
+    return _BitmapNode(first_bit | second_bit, [second, first])
+
+class _BitmapNode:
+    """HAMT branch: a 32-bit bitmap of occupied slots and a compact array of leaves/children"""
+    __slots__ = ('bitmap', 'array')
+
+    def __init__(self, bitmap: int, array: List[Any]):
+        self.bitmap = bitmap
+        self.array = array
+
+    def find(self, shift: int, hash_: int, key: Any) -> Any:
+        bit = 1 << ((hash_ >> shift) & _MASK)
+        if not self.bitmap & bit:
+            return _MISSING
+        slot = self.array[_popcount(self.bitmap & (bit - 1))]
+        if isinstance(slot, _Leaf):
+            return slot.value if slot.matches(hash_, key) else _MISSING
+        return slot.find(shift + _BITS, hash_, key)
+
+    def assoc(self, shift: int, leaf: _Leaf) -> Tuple['_BitmapNode', bool]:
+        """Return (node with leaf set, whether a new key was added); never mutates self"""
+        bit = 1 << ((leaf.hash >> shift) & _MASK)
+        index = _popcount(self.bitmap & (bit - 1))
+        if not self.bitmap & bit:
+            array = self.array[:index] + [leaf] + self.array[index:]
+            return _BitmapNode(self.bitmap | bit, array), True
+        slot = self.array[index]
+        if isinstance(slot, _Leaf):
+            if slot.matches(leaf.hash, leaf.key):
+                if slot.value is leaf.value:
+                    return self, False
+                replacement, added = leaf, False
+            else:
+                replacement, added = _merge(shift + _BITS, slot, leaf), True
+        else:
+            replacement, added = slot.assoc(shift + _BITS, leaf)
+            if replacement is slot:
+                return self, False
+        array = list(self.array)
+        array[index] = replacement
+        return _BitmapNode(self.bitmap, array), added
+
+    def dissoc(self, shift: int, hash_: int, key: Any) -> Any:
+        """Return the replacement for this node after removing key (None when empty)"""
+        bit = 1 << ((hash_ >> shift) & _MASK)
+        if not self.bitmap & bit:
+            return self
+        index = _popcount(self.bitmap & (bit - 1))
+        slot = self.array[index]
+        if isinstance(slot, _Leaf):
+            if not slot.matches(hash_, key):
+                return self
+            replacement = None
+        else:
+            replacement = slot.dissoc(shift + _BITS, hash_, key)
+            if replacement is slot:
+                return self
+        if replacement is None:
+            if len(self.array) == 1:
+                return None
+            array = self.array[:index] + self.array[index + 1:]
+            node = _BitmapNode(self.bitmap & ~bit, array)
+        else:
+            array = list(self.array)
+            array[index] = replacement
+            node = _BitmapNode(self.bitmap, array)
+        # Pull a lone leaf up so lookups stay shallow
+        if shift > 0 and len(node.array) == 1 and isinstance(node.array[0], _Leaf):
+            return node.array[0]
+        return node
+
+    def leaves(self) -> Iterator[_Leaf]:
+        for slot in self.array:
+            if isinstance(slot, _Leaf):
+                yield slot
+            else:
+                yield from slot.leaves()
+
+class _CollisionNode:
+    """Leaves whose hashes are identical (or exhausted) at this depth"""
+    __slots__ = ('hash', 'entries')
+
+    def __init__(self, hash_: int, entries: List[_Leaf]):
+        self.hash = hash_
+        self.entries = entries
+
+    def find(self, shift: int, hash_: int, key: Any) -> Any:
+        for leaf in self.entries:
+            if leaf.matches(hash_, key):
+                return leaf.value
+        return _MISSING
+
+    def assoc(self, shift: int, leaf: _Leaf):
+        if leaf.hash != self.hash:
+            bit = 1 << ((self.hash >> shift) & _MASK)
+            return _BitmapNode(bit, [self]).assoc(shift, leaf)
+        for index, existing in enumerate(self.entries):
+            if existing.matches(leaf.hash, leaf.key):
+                if existing.value is leaf.value:
+                    return self, False
+                entries = list(self.entries)
+                entries[index] = leaf
+                return _CollisionNode(self.hash, entries), False
+        return _CollisionNode(self.hash, self.entries + [leaf]), True
+
+    def dissoc(self, shift: int, hash_: int, key: Any) -> Any:
+        entries = [leaf for leaf in self.entries if not leaf.matches(hash_, key)]
+        if len(entries) == len(self.entries):
+            return self
+        if len(entries) == 1:
+            return entries[0]
+        return _CollisionNode(self.hash, entries)
+
+    def leaves(self) -> Iterator[_Leaf]:
+        return iter(self.entries)
+
+_EMPTY_ROOT = _BitmapNode(0, [])
+
+class PersistentMap(Mapping):
+    """Immutable hash array mapped trie; updates return new maps sharing unchanged structure"""
+    __slots__ = ('_root', '_size')
+
+    def __init__(self, items: Optional[Any] = None):
+        self._root = _EMPTY_ROOT
+        self._size = 0
+        if items:
+            pairs = items.items() if isinstance(items, Mapping) else items
+            for key, value in pairs:
+                self._root, added = self._root.assoc(0, _Leaf(hash(key) & _HASH_MASK, key, value))
+                self._size += added
+
+    @classmethod
+    def _from(cls, root: _BitmapNode, size: int) -> 'PersistentMap':
+        instance = cls.__new__(cls)
+        instance._root = root
+        instance._size = size
+        return instance
+
+    def set(self, key: Any, value: Any) -> 'PersistentMap':
+        root, added = self._root.assoc(0, _Leaf(hash(key) & _HASH_MASK, key, value))
+        if root is self._root:
+            return self
+        return self._from(root, self._size + added)
+
+    def delete(self, key: Any) -> 'PersistentMap':
+        root = self._root.dissoc(0, hash(key) & _HASH_MASK, key)
+        if root is self._root:
+            raise KeyError(key)
+        if root is None:
+            return self._from(_EMPTY_ROOT, 0)
+        return self._from(root, self._size - 1)
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self._root.find(0, hash(key) & _HASH_MASK, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: Any) -> bool:
+        return self._root.find(0, hash(key) & _HASH_MASK, key) is not _MISSING
+
+    def __iter__(self) -> Iterator[Any]:
+        return (leaf.key for leaf in self._root.leaves())
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return f"PersistentMap({dict(self)!r})"
+
+class WorkflowData(MutableMapping):
+    """Mutable view over a PersistentMap so checkpoints can take O(1) immutable snapshots.
+
+    Snapshots capture the top-level keys; values themselves are shared, so steps
+    should assign new values rather than mutate nested containers in place.
+    """
+    __slots__ = ('_map',)
+
+    def __init__(self, initial: Optional[Any] = None):
+        if isinstance(initial, WorkflowData):
+            self._map = initial._map
+        elif isinstance(initial, PersistentMap):
+            self._map = initial
+        else:
+            self._map = PersistentMap(initial)
+
+    def snapshot(self) -> PersistentMap:
+        return self._map
+
+    def copy(self) -> 'WorkflowData':
+        return WorkflowData(self._map)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._map[key]
+
+    def __setitem__(self, key: Any, value: Any):
+        self._map = self._map.set(key, value)
+
+    def __delitem__(self, key: Any):
+        self._map = self._map.delete(key)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._map
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._map)
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def __repr__(self) -> str:
+        return repr(dict(self._map))
\ No newline at end of file
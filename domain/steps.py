@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, List, Mapping, Optional, Sequence
+from .entities import WorkflowContext
+
+@dataclass(frozen=True)
+class StepSpec:
+    """Execution hints a step declares to the engine"""
+    cheap: bool = False  # Fast, synchronous and pure: may be fused with neighbouring cheap steps
+    idempotent: bool = False  # Safe to run more than once for the same input
+    hedge_quantile: Optional[float] = None  # Start a second attempt once a run exceeds this latency quantile
+    hedge_min_delay: float = 0.001  # Never hedge sooner than this many seconds
+
+    def __post_init__(self):
+        if self.hedge_quantile is not None:
+            if not self.idempotent:
+                raise ValueError("Only idempotent steps can be hedged")
+            if not 0 < self.hedge_quantile < 1:
+                raise ValueError("hedge_quantile must be between 0 and 1")
+
+DEFAULT_STEP_SPEC = StepSpec()
+STREAM_OFFSETS_KEY = '_stream_offsets'  # context.data entry holding in-progress stream offsets
+
+def step(**options) -> Callable[[Callable], Callable]:
+    """Decorator attaching a StepSpec to a step function, e.g. ``@step(cheap=True)``"""
+    spec = StepSpec(**options)
+
+    def decorate(fn: Callable) -> Callable:
+        fn.step_spec = spec
+        return fn
+    return decorate
+
+def get_step_spec(fn: Callable) -> StepSpec:
+    return getattr(fn, 'step_spec', DEFAULT_STEP_SPEC)
+
+@dataclass
+class MapStep:
+    """Fan a collection out into child workflows and reduce their results into the parent.
+
+    ``items(context)`` selects the collection; each item runs ``steps`` as a child
+    workflow with its own checkpoints (the item is the child's request, wrapped as
+    ``{'item': item}`` when it is not a dict). ``reduce(context, results)`` receives
+    the children's data in item order.
+    """
+    name: str
+    items: Callable[[WorkflowContext], Sequence[Any]]
+    steps: List[Callable]
+    reduce: Callable[[WorkflowContext, List[Mapping[str, Any]]], WorkflowContext]
+    max_concurrency: int = 4
+
+    def __post_init__(self):
+        self.__name__ = self.name
+
+@dataclass
+class StreamStep:
+    """Process a dataset chunk by chunk through concurrently running stages.
+
+    ``source(context, offset)`` yields chunks starting at chunk ``offset``. Each
+    stage maps one chunk to one chunk (sync or async) and runs as its own task,
+    with at most ``buffer`` chunks queued between neighbours. ``sink(context, chunk)``
+    folds every output chunk into ``context.data``. Per-stage chunk offsets are kept
+    in the checkpointed data, so a resumed stream restarts after the last chunk
+    the sink consumed. Every ``checkpoint_every`` sunk chunks a RUNNING checkpoint
+    is saved; after a crash the stream resumes from it, redoing at most that many
+    chunks.
+    """
+    name: str
+    source: Callable[[WorkflowContext, int], AsyncIterator[Any]]
+    stages: List[Callable[[WorkflowContext, Any], Any]]
+    sink: Callable[[WorkflowContext, Any], Any]
+    buffer: int = 4
+    checkpoint_every: int = 100  # Chunks between mid-stream RUNNING checkpoints
+
+    def __post_init__(self):
+        if self.buffer < 1:
+            raise ValueError("buffer must be at least 1")
+        self.__name__ = self.name
\ No newline at end of file
@@ -0,0 +1,54 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional
+
+class GatewayError(Exception):
+    """Raised when an external system answers a call with an error"""
+
+class JsonLineClient:
+    """Async client for external systems speaking newline-delimited JSON over TCP.
+
+    One request is in flight per connection; share connections through a
+    ResourcePool rather than opening a client per call.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 timeout: Optional[float] = None):
+        self._reader = reader
+        self._writer = writer
+        self.timeout = timeout
+
+    @classmethod
+    async def connect(cls, host: str, port: int, timeout: Optional[float] = 5.0) -> 'JsonLineClient':
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        return cls(reader, writer, timeout)
+
+    @property
+    def closed(self) -> bool:
+        return self._writer.is_closing()
+
+    async def call(self, op: str, **params) -> Dict[str, Any]:
+        self._writer.write(json.dumps({'op': op, **params}, default=str).encode() + b'\n')
+        await self._writer.drain()
+        line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+        if not line:
+            raise ConnectionResetError("Gateway closed the connection")
+        response = json.loads(line)
+        if 'error' in response:
+            raise GatewayError(response['error'])
+        return response
+
+    async def ping(self) -> bool:
+        if self.closed:
+            return False
+        try:
+            return (await self.call('ping')).get('ok', False)
+        except (OSError, asyncio.TimeoutError, GatewayError, ValueError):
+            return False
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except OSError:
+            pass
\ No newline at end of file
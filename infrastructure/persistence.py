@@ -1,17 +1,54 @@
 import json
 import sqlite3
 import asyncio
-from typing import Optional
+import itertools
+import threading
+from collections.abc import Mapping
+from typing import Any, Optional
 from domain.entities import WorkflowCheckpoint, WorkflowState
 from domain.repositories import CheckpointRepository
 
+def _json_default(value: Any) -> Any:
+    # Context snapshots are immutable mappings rather than dicts
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+_memory_databases = itertools.count()
+
 class SQLiteCheckpointRepository(CheckpointRepository):
     def __init__(self, db_path: str = "workflow_checkpoints.db"):
         self.db_path = db_path
-        self._init_db()
+        self._keeper: Optional[sqlite3.Connection] = None
+        self._uri = None
+        if db_path == ":memory:":
+            # Each plain ":memory:" connection is a fresh database; share one named
+            # in-memory database instead, kept alive by a connection of our own
+            self._uri = f"file:pycontext_memory_{next(_memory_databases)}?mode=memory&cache=shared"
+            self._keeper = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        # Schema creation is deferred to first use (or initialize()) to keep startup cheap
+        self._ready = False
+        self._ready_lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._uri is not None:
+            return sqlite3.connect(self._uri, uri=True)
+        return sqlite3.connect(self.db_path)
+    
+    async def initialize(self) -> None:
+        """Create the schema now, off the event loop, instead of on the first checkpoint"""
+        if not self._ready:
+            await asyncio.get_event_loop().run_in_executor(None, self._init_db)
     
     def _init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
+        with self._ready_lock:
+            if self._ready:
+                return
+            self._create_schema()
+            self._ready = True
+    
+    def _create_schema(self):
+        with self._connect() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS checkpoints (
                     workflow_id TEXT PRIMARY KEY,
@@ -26,7 +63,9 @@ class SQLiteCheckpointRepository(CheckpointRepository):
     
     async def save(self, checkpoint: WorkflowCheckpoint) -> None:
         def _save():
-            with sqlite3.connect(self.db_path) as conn:
+            if not self._ready:
+                self._init_db()
+            with self._connect() as conn:
                 conn.execute("""
                     INSERT OR REPLACE INTO checkpoints 
                     (workflow_id, current_step, state, context_data, metadata)
@@ -35,8 +74,8 @@ class SQLiteCheckpointRepository(CheckpointRepository):
                     checkpoint.workflow_id,
                     checkpoint.current_step,
                     checkpoint.state.value,
-                    json.dumps(checkpoint.context_data),
-                    json.dumps(checkpoint.metadata)
+                    json.dumps(checkpoint.context_data, default=_json_default),
+                    json.dumps(checkpoint.metadata, default=_json_default)
                 ))
                 conn.commit()
         
@@ -45,7 +84,9 @@ class SQLiteCheckpointRepository(CheckpointRepository):
     
     async def load(self, workflow_id: str) -> Optional[WorkflowCheckpoint]:
         def _load():
-            with sqlite3.connect(self.db_path) as conn:
+            if not self._ready:
+                self._init_db()
+            with self._connect() as conn:
                 cursor = conn.execute(
                     "SELECT * FROM checkpoints WHERE workflow_id = ?", 
                     (workflow_id,)
@@ -67,7 +108,9 @@ class SQLiteCheckpointRepository(CheckpointRepository):
     
     async def delete(self, workflow_id: str) -> None:
         def _delete():
-            with sqlite3.connect(self.db_path) as conn:
+            if not self._ready:
+                self._init_db()
+            with self._connect() as conn:
                 conn.execute("DELETE FROM checkpoints WHERE workflow_id = ?", (workflow_id,))
                 conn.commit()
         
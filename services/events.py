@@ -0,0 +1,143 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+from domain.entities import WorkflowContext, WorkflowMessage
+
+TERMINAL_KINDS = ('completed', 'failed', 'dropped')
+
+class WorkflowDroppedError(Exception):
+    """Raised from a handle whose message was shed or dropped before it ran"""
+
+@dataclass
+class WorkflowEvent:
+    kind: str  # queued, started, step_started, step_completed, paused, completed, failed, dropped
+    workflow_name: str
+    workflow_id: str
+    step: Optional[int] = None
+    step_name: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def terminal(self) -> bool:
+        return self.kind in TERMINAL_KINDS
+
+class EventSubscription:
+    """Bounded async stream of workflow events.
+
+    A subscriber that falls behind loses its oldest buffered events (counted in
+    ``dropped``) rather than slowing down the workflows it observes.
+    """
+
+    def __init__(self, workflow_name: Optional[str] = None, maxsize: int = 100):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.workflow_name = workflow_name
+        self.dropped = 0
+        self.closed = False
+        self._buffer: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def put(self, event: WorkflowEvent):
+        if self.closed:
+            return
+        if self._buffer.full():
+            self._buffer.get_nowait()
+            self.dropped += 1
+        self._buffer.put_nowait(event)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            if not self._buffer.full():
+                self._buffer.put_nowait(None)  # Wakes a reader blocked on an empty buffer
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> WorkflowEvent:
+        if self.closed and self._buffer.empty():
+            raise StopAsyncIteration
+        event = await self._buffer.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+class WorkflowHandle:
+    """Returned by publish: await it for the final context, iterate ``events`` for progress"""
+
+    def __init__(self, message: WorkflowMessage, events: EventSubscription):
+        self.workflow_name = message.workflow_name
+        self.workflow_id = message.context.id
+        self.events = events
+        self.result: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Mark failures as retrieved so callers that never await do not get warnings
+        self.result.add_done_callback(lambda future: future.cancelled() or future.exception())
+
+    def done(self) -> bool:
+        return self.result.done()
+
+    def __await__(self):
+        return asyncio.shield(self.result).__await__()
+
+class EventBus:
+    """Fans workflow events out to publish handles and per-workflow-name subscribers"""
+
+    def __init__(self, handle_buffer: int = 256):
+        self.handle_buffer = handle_buffer
+        self._subscribers: Dict[Optional[str], Set[EventSubscription]] = {}
+        self._handles: Dict[str, WorkflowHandle] = {}
+
+    def subscribe(self, workflow_name: Optional[str] = None, maxsize: int = 100) -> EventSubscription:
+        """Stream every event of workflow_name (all workflows when None)"""
+        subscription = EventSubscription(workflow_name, maxsize)
+        self._subscribers.setdefault(workflow_name, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription):
+        self._subscribers.get(subscription.workflow_name, set()).discard(subscription)
+        subscription.close()
+
+    def __contains__(self, workflow_id: str) -> bool:
+        """Whether workflow_id has a handle that has not been settled yet"""
+        return workflow_id in self._handles
+
+    def track(self, message: WorkflowMessage) -> WorkflowHandle:
+        if message.context.id in self._handles:
+            raise ValueError(f"Workflow {message.context.id} already has an unsettled handle")
+        handle = WorkflowHandle(message, EventSubscription(message.workflow_name, self.handle_buffer))
+        self._handles[handle.workflow_id] = handle
+        return handle
+
+    def emit(self, kind: str, workflow_name: str, workflow_id: str, step: Optional[int] = None,
+             step_name: Optional[str] = None, **data):
+        handle = self._handles.get(workflow_id)
+        targets: List[EventSubscription] = [
+            *self._subscribers.get(workflow_name, ()), *self._subscribers.get(None, ())
+        ]
+        if handle is None and not targets:
+            return
+        event = WorkflowEvent(kind, workflow_name, workflow_id, step, step_name, data=data)
+        for subscription in targets:
+            subscription.put(event)
+        if handle is not None:
+            handle.events.put(event)
+
+    def resolve(self, workflow_id: str, result: Optional[WorkflowContext] = None,
+                error: Optional[BaseException] = None):
+        """Settle the handle for workflow_id and end its event stream"""
+        handle = self._handles.pop(workflow_id, None)
+        if handle is None:
+            return
+        if not handle.result.done():
+            if error is not None:
+                handle.result.set_exception(error)
+            else:
+                handle.result.set_result(result)
+        handle.events.close()
+
+    def close(self):
+        for subscriptions in self._subscribers.values():
+            for subscription in subscriptions:
+                subscription.close()
+        self._subscribers.clear()
\ No newline at end of file
@@ -0,0 +1,69 @@
+import inspect
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from domain.entities import WorkflowContext
+from domain.steps import MapStep, StreamStep, get_step_spec
+
+@dataclass
+class PlanUnit:
+    """One checkpointed unit of work: a single step or a run of fused cheap steps"""
+    start: int
+    steps: Tuple[Callable, ...]
+    name: str = field(init=False)
+    end: int = field(init=False)
+    map_step: Optional[MapStep] = field(init=False)
+    stream_step: Optional[StreamStep] = field(init=False)
+    hedge_quantile: Optional[float] = field(init=False)
+    hedge_min_delay: float = field(init=False)
+    checkpoint_metadata: Dict[str, str] = field(init=False)
+
+    def __post_init__(self):
+        # Per-step bookkeeping is computed once here instead of on every execution
+        self.name = '+'.join(step.__name__ for step in self.steps)
+        self.end = self.start + len(self.steps)
+        self.checkpoint_metadata = {'step_name': self.name}
+        self.map_step = self.steps[0] if isinstance(self.steps[0], MapStep) else None
+        self.stream_step = self.steps[0] if isinstance(self.steps[0], StreamStep) else None
+        spec = get_step_spec(self.steps[0])
+        if spec.hedge_quantile is not None and not inspect.iscoroutinefunction(self.steps[0]):
+            # A losing attempt must be cancellable; a thread running a sync step is not
+            raise ValueError(f"Hedged step {self.steps[0].__name__} must be a coroutine function")
+        self.hedge_quantile = spec.hedge_quantile if len(self.steps) == 1 else None
+        self.hedge_min_delay = spec.hedge_min_delay
+        self.__name__ = self.name
+
+    def __call__(self, context: WorkflowContext) -> WorkflowContext:
+        for step in self.steps:
+            context = step(context)
+        return context
+
+def compile_plan(steps: Sequence[Callable], fuse: bool = True) -> List[PlanUnit]:
+    """Group steps into plan units, fusing consecutive steps declared cheap"""
+    plan: List[PlanUnit] = []
+    run: List[Callable] = []
+    run_start = 0
+    for index, step in enumerate(steps):
+        # Async steps always get their own unit; PlanUnit.__call__ runs synchronously
+        if fuse and get_step_spec(step).cheap and not inspect.iscoroutinefunction(step):
+            if not run:
+                run_start = index
+            run.append(step)
+            continue
+        if run:
+            plan.append(PlanUnit(run_start, tuple(run)))
+            run = []
+        plan.append(PlanUnit(index, (step,)))
+    if run:
+        plan.append(PlanUnit(run_start, tuple(run)))
+    return plan
+
+def plan_from(plan: List[PlanUnit], start_step: int) -> List[PlanUnit]:
+    """Units left to run when resuming at start_step, splitting a fused unit if needed"""
+    remaining = []
+    for unit in plan:
+        if unit.end <= start_step:
+            continue
+        if unit.start < start_step:
+            unit = PlanUnit(start_step, unit.steps[start_step - unit.start:])
+        remaining.append(unit)
+    return remaining
\ No newline at end of file
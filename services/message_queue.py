@@ -1,66 +1,402 @@
 import asyncio
 import heapq
-from typing import Dict
-from domain.entities import WorkflowMessage
+import itertools
+import logging
+import time
+from enum import Enum
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+from domain.entities import WorkflowMessage, WorkflowState, Priority
 from domain.repositories import CheckpointRepository
-from .workflow_engine import WorkflowEngine
+from .events import EventBus, WorkflowDroppedError, WorkflowHandle
+from .metrics import QueueMetrics
+from .structured_logging import log_event
+from .workflow_engine import WorkflowEngine, WorkflowYielded
+
+if TYPE_CHECKING:  # Only lazy-loading workers need the registry
+    from .registry import WorkflowRegistry
+
+class OverflowPolicy(Enum):
+    BLOCK = "block"              # Wait in publish until space frees up
+    REJECT = "reject"            # Raise QueueFullError immediately
+    SHED_OLDEST = "shed_oldest"  # Drop the oldest queued message of equal or lower priority
+    SHED_LOWEST = "shed_lowest"  # Drop the oldest message of the lowest queued priority
+
+class SchedulingPolicy(Enum):
+    PRIORITY = "priority"                  # Priority class, then numeric priority
+    EDF_WITHIN_CLASS = "edf_within_class"  # Priority class, then earliest deadline
+    EDF = "edf"                            # Earliest deadline across all classes
+
+class LatePolicy(Enum):
+    RUN = "run"    # Run late work as usual (still counted)
+    FLAG = "flag"  # Run late work with message.late set
+    DROP = "drop"  # Discard work whose deadline can no longer be met
+
+class QueueFullError(Exception):
+    """Raised when a message cannot be admitted to a full queue"""
+
+class QueueStoppedError(QueueFullError):
+    """Raised to publishers still waiting for space when the queue is stopped"""
 
 class WorkflowMessageQueue:
-    def __init__(self, preemptive: bool = False, checkpoint_repo: CheckpointRepository = None):
+    def __init__(self, preemptive: bool = False, checkpoint_repo: CheckpointRepository = None,
+                 max_size: Optional[int] = None, capacity: Optional[Dict[Priority, int]] = None,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 high_priority_reserve: int = 0, publish_timeout: Optional[float] = None,
+                 scheduling: SchedulingPolicy = SchedulingPolicy.PRIORITY,
+                 late_policy: LatePolicy = LatePolicy.FLAG,
+                 preemption_threshold: Optional[float] = None,
+                 preempt_at_step_boundary: bool = False,
+                 registry: Optional['WorkflowRegistry'] = None):
         self.queue = []
         self.engines: Dict[str, WorkflowEngine] = {}
+        self.registry = registry  # Builds engines for unregistered workflow names on first use
         self.running = False
         self.preemptive = preemptive
         self.checkpoint_repo = checkpoint_repo
         self.current_task = None
-    
+        self.current_message: Optional[WorkflowMessage] = None
+        self._paused: Set[str] = set()  # Context ids re-queued after preemption
+        self._preempted = False  # The running task was cancelled by _preempt, not by shutdown
+        self._stopping = False
+
+        # Admission control: total size, per-priority capacity and HIGH headroom
+        self.max_size = max_size
+        self.capacity = dict(capacity or {})
+        self.overflow_policy = overflow_policy
+        self.high_priority_reserve = high_priority_reserve
+        self.publish_timeout = publish_timeout
+        self.metrics = QueueMetrics()
+        self.recorder = None  # Optional services.traffic.TrafficRecorder
+        self.events = EventBus()  # Push-based progress and completion notifications
+        self._depth: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self._sequence = itertools.count()
+        self._not_full: Optional[asyncio.Condition] = None
+        self._not_empty: Optional[asyncio.Event] = None
+
+        # Deadline-aware scheduling
+        self.scheduling = scheduling
+        self.late_policy = late_policy
+        
+        # Cost-aware preemption: let nearly finished work complete, or pause at
+        # the next step boundary instead of cancelling mid-step
+        self.preemption_threshold = preemption_threshold
+        self.preempt_at_step_boundary = preempt_at_step_boundary
+
     def register_workflow(self, name: str, engine: WorkflowEngine):
         self.engines[name] = engine
-    
-    async def publish(self, message: WorkflowMessage):
-        heapq.heappush(self.queue, message)
-        
+        if engine.events is None:
+            engine.events = self.events
+
+    async def engine(self, name: str) -> Optional[WorkflowEngine]:
+        engine = self.engines.get(name)
+        if engine is None and self.registry is not None and name in self.registry:
+            engine = await self.registry.prepare(name)  # Step imports run off the loop
+            self.register_workflow(name, engine)
+        return engine
+
+    def depth(self, priority: Optional[Priority] = None) -> int:
+        if priority is None:
+            return len(self.queue)
+        return self._depth[priority]
+
+    def subscribe(self, workflow_name: Optional[str] = None, maxsize: int = 100):
+        """Async iterator over every event of workflow_name (all workflows when None)"""
+        return self.events.subscribe(workflow_name, maxsize)
+
+    async def publish(self, message: WorkflowMessage) -> WorkflowHandle:
+        """Admit a message; the returned handle resolves to its final context"""
+        if message.context.id in self.events:
+            # The first handle would never resolve and both runs would share one checkpoint
+            raise ValueError(f"Workflow {message.context.id} is already queued or running")
+        if self.recorder is not None:  # At arrival, so replays include rejected and blocked load
+            self.recorder.record(message)
+        if not self._has_space(message.priority):
+            await self._handle_overflow(message)
+        message.enqueued_at = time.monotonic()
+        handle = self.events.track(message)
+        self._push(message)
+        self.metrics.increment('admitted', message.priority)
+        self._emit('queued', message)
+
         # Preemptive interruption for high priority
-        if (self.preemptive and message.priority.value == 1 and 
+        if (self.preemptive and message.priority.value == 1 and
             self.current_task and not self.current_task.done()):
-            if message.context.logger:
-                message.context.logger.warning("🚨 HIGH PRIORITY - Interrupting current workflow")
-            self.current_task.cancel()
+            self._preempt(message)
+        return handle
     
+    def _preempt(self, message: WorkflowMessage):
+        current = self.current_message
+        if current is None or current.priority.value <= message.priority.value:
+            return  # Never interrupt work that is at least as urgent
+        engine = self.engines.get(current.workflow_name)
+        if engine and self.preemption_threshold is not None:
+            remaining = engine.estimate_remaining(current.context.id)
+            if remaining is not None and remaining <= self.preemption_threshold:
+                self.metrics.increment('preemption_skipped', current.priority)
+                self._log(message, logging.INFO, "⏩ HIGH PRIORITY - Letting %s finish (~%.3fs left)",
+                          current.workflow_name, remaining, remaining_seconds=remaining)
+                return
+        if engine and self.preempt_at_step_boundary and engine.request_yield(current.context.id):
+            self.metrics.increment('preemption_deferred', current.priority)
+            self._log(message, logging.WARNING, "🚨 HIGH PRIORITY - Interrupting current workflow at next step")
+            return
+        self.metrics.increment('preempted', current.priority)
+        self._log(message, logging.WARNING, "🚨 HIGH PRIORITY - Interrupting current workflow")
+        self._preempted = True
+        self.current_task.cancel()
+
+    def _has_space(self, priority: Priority) -> bool:
+        limit = self.capacity.get(priority)
+        if limit is not None and self._depth[priority] >= limit:
+            return False
+        if self.max_size is not None:
+            limit = self.max_size
+            if priority != Priority.HIGH:
+                limit -= self.high_priority_reserve
+            if len(self.queue) >= limit:
+                return False
+        return True
+
+    async def _handle_overflow(self, message: WorkflowMessage):
+        priority = message.priority
+        if self.overflow_policy == OverflowPolicy.BLOCK:
+            await self._wait_for_space(message)
+        elif self.overflow_policy == OverflowPolicy.REJECT:
+            self._reject(message)
+        else:
+            while not self._has_space(priority):
+                victim = self._select_victim(priority)
+                if victim is None:
+                    self._reject(message)
+                self._remove(victim)
+                self.metrics.increment('shed', victim.priority)
+                self._log(victim, logging.WARNING, "🗑️ Shed %s (Priority: %s) - queue full",
+                          victim.workflow_name, victim.priority.name)
+                self._settle(victim, 'dropped', error=WorkflowDroppedError("Shed from a full queue"),
+                             reason='shed')
+
+    async def _wait_for_space(self, message: WorkflowMessage):
+        priority = message.priority
+        if self._not_full is None:
+            self._not_full = asyncio.Condition()
+        self.metrics.increment('blocked', priority)
+        loop = asyncio.get_event_loop()
+        started = loop.time()
+        try:
+            async with self._not_full:
+                await asyncio.wait_for(
+                    self._not_full.wait_for(lambda: self._stopping or self._has_space(priority)),
+                    self.publish_timeout
+                )
+        except asyncio.TimeoutError:
+            self.metrics.increment('timed_out', priority)
+            self._reject(message)
+        finally:
+            self.metrics.record_wait(priority, loop.time() - started)
+        if self._stopping:
+            raise QueueStoppedError(f"Queue stopped while {message.workflow_name} waited for space")
+
+    def _reject(self, message: WorkflowMessage):
+        self.metrics.increment('rejected', message.priority)
+        self._log(message, logging.WARNING, "⛔ Rejected %s (Priority: %s) - queue full",
+                  message.workflow_name, message.priority.name)
+        raise QueueFullError(f"Queue full for priority {message.priority.name}")
+
+    def _select_victim(self, priority: Priority) -> Optional[WorkflowMessage]:
+        # A full priority class can only make room within itself; a full queue
+        # sheds work of equal or lower priority, never more urgent work.
+        limit = self.capacity.get(priority)
+        if limit is not None and self._depth[priority] >= limit:
+            candidates = [entry for entry in self.queue if entry[-1].priority == priority]
+        else:
+            candidates = [entry for entry in self.queue if entry[-1].priority.value >= priority.value]
+        if not candidates:
+            return None
+        if self.overflow_policy == OverflowPolicy.SHED_LOWEST:
+            lowest = max(entry[-1].priority.value for entry in candidates)
+            candidates = [entry for entry in candidates if entry[-1].priority.value == lowest]
+        return min(candidates, key=lambda entry: entry[-2])[-1]
+
+    def _sort_key(self, message: WorkflowMessage) -> List:
+        deadline = message.deadline if message.deadline is not None else float('inf')
+        if self.scheduling == SchedulingPolicy.EDF:
+            return [deadline, message.priority.value, message.effective_priority]
+        if self.scheduling == SchedulingPolicy.EDF_WITHIN_CLASS:
+            return [message.priority.value, deadline, message.effective_priority]
+        return [message.priority.value, message.effective_priority]
+
+    def _push(self, message: WorkflowMessage):
+        entry = self._sort_key(message) + [next(self._sequence), message]
+        heapq.heappush(self.queue, entry)
+        self._depth[message.priority] += 1
+        if self._not_empty is not None:
+            self._not_empty.set()
+
+    def _pop(self) -> WorkflowMessage:
+        message = heapq.heappop(self.queue)[-1]
+        self._depth[message.priority] -= 1
+        return message
+
+    def _remove(self, message: WorkflowMessage):
+        self.queue = [entry for entry in self.queue if entry[-1] is not message]
+        heapq.heapify(self.queue)
+        self._depth[message.priority] -= 1
+
+    async def _notify_space(self):
+        if self._not_full is not None:
+            async with self._not_full:
+                self._not_full.notify_all()
+
+    def estimated_runtime(self, workflow_name: str, start_step: int = 0) -> float:
+        engine = self.engines.get(workflow_name)  # Not-yet-loaded workflows have no estimates
+        return engine.estimate_runtime(start_step) if engine else 0.0
+
+    def _checkpoint_repo(self, message: WorkflowMessage) -> Optional[CheckpointRepository]:
+        engine = self.engines.get(message.workflow_name)
+        if engine is not None and engine.checkpoint_repo is not None:
+            return engine.checkpoint_repo
+        return self.checkpoint_repo
+
+    async def _admit_deadline(self, message: WorkflowMessage) -> bool:
+        """Apply the late policy to a message whose deadline can no longer be met"""
+        remaining = message.time_remaining()
+        if remaining is None:
+            self._paused.discard(message.context.id)
+            return True
+        # A preempted message resumes from its PAUSED checkpoint, so only the steps
+        # left after it count against the deadline
+        checkpoint = None
+        checkpoint_repo = self._checkpoint_repo(message)
+        if message.context.id in self._paused and checkpoint_repo is not None:
+            checkpoint = await checkpoint_repo.load(message.context.id)
+            if checkpoint is not None and checkpoint.state != WorkflowState.PAUSED:
+                checkpoint = None
+        self._paused.discard(message.context.id)
+        start_step = checkpoint.current_step if checkpoint else 0
+        if remaining >= self.estimated_runtime(message.workflow_name, start_step):
+            return True
+        self.metrics.increment('deadline_infeasible', message.priority)
+        if self.late_policy == LatePolicy.DROP:
+            if checkpoint is not None:  # The workflow will never resume
+                await checkpoint_repo.delete(message.context.id)
+            self.metrics.increment('deadline_dropped', message.priority)
+            self._log(message, logging.WARNING, "⌛ Dropped %s (Priority: %s) - deadline cannot be met",
+                      message.workflow_name, message.priority.name)
+            self._settle(message, 'dropped', error=WorkflowDroppedError("Deadline cannot be met"),
+                         reason='deadline')
+            return False
+        if self.late_policy == LatePolicy.FLAG:
+            message.late = True
+        return True
+
+    async def _wait_for_message(self):
+        if self._not_empty is None:
+            self._not_empty = asyncio.Event()
+        self._not_empty.clear()
+        await self._not_empty.wait()
+
     async def start_consumer(self):
         self.running = True
-        while self.running:
-            if self.queue:
-                message = heapq.heappop(self.queue)
-                self.current_task = asyncio.create_task(self._process_message(message))
-                try:
-                    await self.current_task
-                except asyncio.CancelledError:
-                    # Re-queue interrupted message
-                    heapq.heappush(self.queue, message)
-                    if message.context.logger:
-                        message.context.logger.info(f"📋 Workflow {message.workflow_name} paused and re-queued")
-            else:
-                await asyncio.sleep(0.1)
-    
+        self._stopping = False
+        try:
+            while self.running:
+                if self.queue:
+                    await self._consume(self._pop())
+                else:
+                    await self._wait_for_message()
+        finally:
+            self.running = False
+            self._drop_outstanding()
+            await self._notify_space()
+
+    async def _consume(self, message: WorkflowMessage):
+        await self._notify_space()
+        if not await self._admit_deadline(message):
+            return
+        self.current_message = message
+        self._preempted = False
+        self.current_task = asyncio.create_task(self._process_message(message))
+        try:
+            await self.current_task
+        except (asyncio.CancelledError, WorkflowYielded) as e:
+            if isinstance(e, asyncio.CancelledError) and not self._preempted:
+                self._drop(message, "Queue stopped while the workflow was running")
+                raise  # The consumer itself was cancelled
+            # Re-queue interrupted message; it was already admitted once
+            self._paused.add(message.context.id)
+            self._push(message)
+            self._emit('paused', message)
+            self._log(message, logging.INFO, "📋 Workflow %s paused and re-queued", message.workflow_name)
+        finally:
+            self.current_message = None
+
+    def _drop(self, message: WorkflowMessage, reason: str):
+        self._paused.discard(message.context.id)
+        self._settle(message, 'dropped', error=WorkflowDroppedError(reason), reason='stopped')
+
+    def _drop_outstanding(self):
+        """Fail the handles of messages left queued when the consumer exits"""
+        while self.queue:
+            message = self._pop()
+            self.metrics.increment('stopped', message.priority)
+            self._drop(message, "Queue stopped before the workflow ran")
+
     async def _process_message(self, message: WorkflowMessage):
-        engine = self.engines.get(message.workflow_name)
+        try:
+            engine = await self.engine(message.workflow_name)
+        except Exception as e:  # A lazily loaded definition whose steps cannot be imported
+            safe_name = message.workflow_name.replace('\n', '').replace('\r', '')
+            self.metrics.increment('failed', message.priority)
+            self._log(message, logging.ERROR, "❌ Failed to load %s: %s", safe_name, e, error=str(e))
+            self._settle(message, 'failed', error=e, error_message=str(e))
+            return
         if engine:
+            self._emit('started', message)
             try:
-                await engine.execute(message.context)
-                if message.context.logger:
-                    message.context.logger.info(f"✅ Completed {message.workflow_name} (Priority: {message.priority.name})")
-            except asyncio.CancelledError:
+                context = await engine.execute(message.context, profile=message.profile)
+                self._record_completion(message)
+                self._log(message, logging.INFO, "✅ Completed %s (Priority: %s)",
+                          message.workflow_name, message.priority.name)
+                self._settle(message, 'completed', result=context)
+            except (asyncio.CancelledError, WorkflowYielded):
                 raise  # Re-raise to handle in consumer
             except Exception as e:
-                if message.context.logger:
-                    # Sanitize workflow name to prevent log injection
-                    safe_name = message.workflow_name.replace('\n', '').replace('\r', '')
-                    message.context.logger.error(f"❌ Failed {safe_name}: {e}")
-        else:
-            if message.context.logger:
+                # Sanitize workflow name to prevent log injection
                 safe_name = message.workflow_name.replace('\n', '').replace('\r', '')
-                message.context.logger.error(f"⚠️ Workflow '{safe_name}' not registered")
-    
+                self.metrics.increment('failed', message.priority)
+                self._log(message, logging.ERROR, "❌ Failed %s: %s", safe_name, e, error=str(e))
+                self._settle(message, 'failed', error=e, error_message=str(e))
+        else:
+            self.metrics.increment('failed', message.priority)
+            safe_name = message.workflow_name.replace('\n', '').replace('\r', '')
+            self._log(message, logging.ERROR, "⚠️ Workflow '%s' not registered", safe_name)
+            self._settle(message, 'failed', error=LookupError(f"Workflow '{safe_name}' not registered"))
+
+    def _log(self, message: WorkflowMessage, level: int, msg: str, *args, **fields):
+        log_event(message.context.logger, level, msg, *args, workflow=message.workflow_name,
+                  workflow_id=message.context.id, priority=message.priority.name, **fields)
+
+    def _emit(self, kind: str, message: WorkflowMessage, **data):
+        self.events.emit(kind, message.workflow_name, message.context.id, **data)
+
+    def _settle(self, message: WorkflowMessage, kind: str, result=None, error=None, **data):
+        self._emit(kind, message, **data)
+        self.events.resolve(message.context.id, result=result, error=error)
+
+    def _record_completion(self, message: WorkflowMessage):
+        finished = time.monotonic()
+        self.metrics.increment('completed', message.priority)
+        if message.enqueued_at is not None:
+            self.metrics.record_latency(message.priority, finished - message.enqueued_at)
+        if message.deadline is not None:
+            met = finished <= message.deadline
+            self.metrics.increment('deadline_met' if met else 'deadline_missed', message.priority)
+
     def stop(self):
-        self.running = False
\ No newline at end of file
+        """Stop consuming once the running workflow finishes; queued messages are dropped"""
+        self.running = False
+        self._stopping = True
+        if self._not_empty is not None:
+            self._not_empty.set()
+        if self._not_full is not None:  # Wake publishers blocked on a full queue
+            asyncio.ensure_future(self._notify_space())
\ No newline at end of file
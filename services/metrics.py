@@ -0,0 +1,100 @@
+from collections import defaultdict, deque
+from typing import Dict, Optional, Tuple
+from domain.entities import Priority
+
+class QueueMetrics:
+    """Counters, wait timings and end-to-end latency, keyed by priority class"""
+
+    def __init__(self, latency_window: int = 10000):
+        self.counters: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.wait_seconds: Dict[str, float] = defaultdict(float)
+        self.latency: Dict[str, LatencyStats] = {}
+        self.latency_window = latency_window
+
+    def increment(self, event: str, priority: Priority, amount: int = 1):
+        self.counters[(event, priority.name)] += amount
+
+    def record_wait(self, priority: Priority, seconds: float):
+        self.wait_seconds[priority.name] += seconds
+
+    def record_latency(self, priority: Priority, seconds: float):
+        stats = self.latency.get(priority.name)
+        if stats is None:
+            stats = self.latency[priority.name] = LatencyStats(window=self.latency_window)
+        stats.record(seconds)
+
+    def count(self, event: str, priority: Optional[Priority] = None) -> int:
+        if priority is not None:
+            return self.counters.get((event, priority.name), 0)
+        return sum(value for (name, _), value in self.counters.items() if name == event)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        result: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for (event, priority), value in self.counters.items():
+            result[event][priority] = value
+        for priority, seconds in self.wait_seconds.items():
+            result['wait_seconds'][priority] = seconds
+        return dict(result)
+
+class LatencyStats:
+    """EWMA and sliding-window quantiles of observed durations in seconds"""
+
+    def __init__(self, alpha: float = 0.2, window: int = 256):
+        self.alpha = alpha
+        self.ewma: Optional[float] = None
+        self.count = 0
+        self.samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.samples.append(seconds)
+        if self.ewma is None:
+            self.ewma = seconds
+        else:
+            self.ewma = self.alpha * seconds + (1 - self.alpha) * self.ewma
+
+    def estimate(self, default: float = 0.0) -> float:
+        return default if self.ewma is None else self.ewma
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class HedgeStats:
+    """Hedged re-execution counters and latencies for one step.
+
+    ``unhedged`` holds runs with a single attempt: those before hedging starts and
+    a held-out share afterwards. ``latency`` holds hedged runs. Comparing their
+    quantiles gives the tail-latency gain of hedging.
+    """
+
+    def __init__(self):
+        self.runs = 0        # Runs that could start a second attempt
+        self.hedged = 0      # Runs that started a second attempt
+        self.hedge_wins = 0  # Hedged runs where the second attempt finished first
+        self.held_out = 0    # Runs deliberately left unhedged once hedging was active
+        self.unhedged = LatencyStats()
+        self.latency = LatencyStats()
+
+    @property
+    def rate(self) -> float:
+        return self.hedged / self.runs if self.runs else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        return self.hedge_wins / self.hedged if self.hedged else 0.0
+
+    def tail_gain(self, q: float = 0.99) -> Optional[float]:
+        """Seconds hedging takes off the q latency quantile, or None before both sides have runs"""
+        without, with_hedging = self.unhedged.quantile(q), self.latency.quantile(q)
+        if without is None or with_hedging is None:
+            return None
+        return without - with_hedging
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        return {'runs': self.runs, 'hedged': self.hedged, 'hedge_wins': self.hedge_wins,
+                'held_out': self.held_out, 'rate': self.rate, 'win_rate': self.win_rate,
+                'p99_unhedged': self.unhedged.quantile(0.99), 'p99_hedged': self.latency.quantile(0.99),
+                'p99_gain': self.tail_gain(0.99)}
\ No newline at end of file
@@ -0,0 +1,119 @@
+import asyncio
+import cProfile
+import logging
+import os
+import random
+import sys
+import threading
+from collections import Counter
+from typing import Any, Awaitable, Callable, Iterable, Optional, TypeVar
+from .structured_logging import log_event
+
+T = TypeVar('T')
+
+# cProfile can only have one active profiler per interpreter (3.12+) or thread (earlier)
+_PROFILER_LOCK = threading.Lock()
+
+class StackSampler:
+    """Background thread that samples one thread's stack into collapsed-stack counts.
+
+    Given a task, samples are kept only while that task is the one running on its
+    loop, so other tasks interleaved on the same thread are not blamed on it.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001,
+                 task: Optional[asyncio.Task] = None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.task = task
+        self._loop = task.get_loop() if task is not None else None
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='workflow-stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            if self.task is not None and asyncio.current_task(self._loop) is not self.task:
+                continue  # Loop idle or running another task
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: str):
+        with open(path, 'w') as fh:
+            for stack, count in self.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+
+class WorkflowProfiler:
+    """Opt-in per-step profiling, selected by workflow name, sample rate or message flag.
+
+    Each profiled step writes a cProfile dump (``.prof``, readable with pstats or
+    snakeviz) and a collapsed-stack file (``.folded``, for flamegraph.pl or
+    speedscope) to ``output_dir/<workflow>/<workflow_id>/``.
+
+    The ``.folded`` stacks cover only the step's own task. cProfile traces the
+    whole loop thread, so for async steps the ``.prof`` also includes whatever
+    other tasks ran while the step was awaiting. Only one step is profiled at a
+    time; a step selected while another is being profiled runs unprofiled.
+    """
+
+    def __init__(self, output_dir: str, workflows: Optional[Iterable[str]] = None,
+                 sample_rate: float = 0.0, sample_interval: float = 0.001):
+        self.output_dir = output_dir
+        self.workflows = set(workflows or ())
+        self.sample_rate = sample_rate
+        self.sample_interval = sample_interval
+        self.skipped = 0  # Steps run unprofiled because another profile was active
+
+    def should_profile(self, workflow_name: str, requested: bool = False) -> bool:
+        if requested or workflow_name in self.workflows:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def profile_step(self, run: Callable[[], Awaitable[T]], workflow_name: str,
+                           workflow_id: str, index: int, step_name: str, logger: Any = None) -> T:
+        profile = cProfile.Profile()
+        if not _PROFILER_LOCK.acquire(blocking=False):
+            return await self._run_unprofiled(run, logger, workflow_name, workflow_id, step_name)
+        try:
+            profile.enable()
+        except ValueError:  # Some other profiling tool is active
+            _PROFILER_LOCK.release()
+            return await self._run_unprofiled(run, logger, workflow_name, workflow_id, step_name)
+        sampler = StackSampler(threading.get_ident(), self.sample_interval, asyncio.current_task())
+        sampler.start()
+        try:
+            return await run()
+        finally:
+            profile.disable()
+            _PROFILER_LOCK.release()
+            prefix = os.path.join(self.output_dir, workflow_name, workflow_id, f"{index:02d}_{step_name}")
+            # Joining the sampler and writing files would block the loop
+            await asyncio.get_running_loop().run_in_executor(None, self._write, profile, sampler, prefix)
+
+    async def _run_unprofiled(self, run: Callable[[], Awaitable[T]], logger: Any,
+                              workflow_name: str, workflow_id: str, step_name: str) -> T:
+        self.skipped += 1
+        log_event(logger, logging.INFO, "[%s] Profiler busy, running %s unprofiled",
+                  workflow_name, step_name, workflow=workflow_name, workflow_id=workflow_id,
+                  step_name=step_name)
+        return await run()
+
+    @staticmethod
+    def _write(profile: cProfile.Profile, sampler: StackSampler, prefix: str):
+        sampler.stop()
+        os.makedirs(os.path.dirname(prefix), exist_ok=True)
+        profile.dump_stats(f"{prefix}.prof")
+        sampler.write_collapsed(f"{prefix}.folded")
\ No newline at end of file
@@ -0,0 +1,146 @@
+import asyncio
+import importlib
+import json
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Set
+from domain.repositories import CheckpointRepository
+from .workflow_engine import WorkflowEngine
+
+if TYPE_CHECKING:
+    from .resources import ResourceRegistry
+
+ENTRY_POINT_GROUP = 'pycontext.workflows'
+
+@dataclass
+class WorkflowDefinition:
+    """Declarative workflow: step references are imported on first use"""
+    name: str
+    steps: List[str]  # "package.module:attribute" references
+    resources: List[str] = field(default_factory=list)  # Pools to warm before first use
+    step_delay: float = 0.0
+    fuse: bool = True
+
+    @classmethod
+    def from_dict(cls, name: str, spec: Mapping[str, Any]) -> 'WorkflowDefinition':
+        return cls(name=name, **spec)
+
+    @property
+    def modules(self) -> Set[str]:
+        return {ref.partition(':')[0] for ref in self.steps}
+
+def resolve(ref: str) -> Any:
+    """Import the object named by a "module:attribute" reference"""
+    module_name, _, attribute = ref.partition(':')
+    if not attribute:
+        raise ValueError(f"Step reference must look like 'module:attribute', got {ref!r}")
+    target = importlib.import_module(module_name)
+    for part in attribute.split('.'):
+        target = getattr(target, part)
+    return target
+
+def _coerce(source: Any) -> List[WorkflowDefinition]:
+    if callable(source) and not isinstance(source, Mapping):
+        source = source()
+    if isinstance(source, Mapping):
+        source = source.get('workflows', source)
+        return [spec if isinstance(spec, WorkflowDefinition) else WorkflowDefinition.from_dict(name, spec)
+                for name, spec in source.items()]
+    return list(source)
+
+def load_definitions(path: str) -> List[WorkflowDefinition]:
+    """Read ``{"workflows": {name: {"steps": [...], ...}}}`` from a JSON file"""
+    with open(path, encoding='utf-8') as fh:
+        return _coerce(json.load(fh))
+
+def definitions_from_entry_points(group: str = ENTRY_POINT_GROUP) -> List[WorkflowDefinition]:
+    """Collect definitions advertised by installed packages under an entry-point group"""
+    from importlib import metadata  # Costly to import; only needed when entry points are used
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, 'select'):
+        selected = entry_points.select(group=group)
+    else:  # Python < 3.10
+        selected = entry_points.get(group, [])
+    definitions = []
+    for entry_point in selected:
+        definitions.extend(_coerce(entry_point.load()))
+    return definitions
+
+class WorkflowRegistry:
+    """Workflow definitions whose engines are built, and step modules imported, on first use"""
+
+    def __init__(self, checkpoint_repo: Optional[CheckpointRepository] = None,
+                 resources: Optional['ResourceRegistry'] = None, **engine_options):
+        self.checkpoint_repo = checkpoint_repo
+        self.resources = resources
+        self.engine_options = engine_options
+        self.definitions: Dict[str, WorkflowDefinition] = {}
+        self._engines: Dict[str, WorkflowEngine] = {}
+
+    def add(self, definition: WorkflowDefinition):
+        self.definitions[definition.name] = definition
+        self._engines.pop(definition.name, None)
+
+    def load(self, source: Any) -> 'WorkflowRegistry':
+        """Add definitions from a mapping, an iterable of definitions, or a callable returning either"""
+        for definition in _coerce(source):
+            self.add(definition)
+        return self
+
+    def load_config(self, path: str) -> 'WorkflowRegistry':
+        return self.load(load_definitions(path))
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> 'WorkflowRegistry':
+        return self.load(definitions_from_entry_points(group))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.definitions
+
+    def names(self) -> List[str]:
+        return list(self.definitions)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._engines
+
+    def get(self, name: str) -> WorkflowEngine:
+        engine = self._engines.get(name)
+        if engine is None:
+            definition = self.definitions.get(name)
+            if definition is None:
+                raise KeyError(f"Unknown workflow: {name}")
+            engine = WorkflowEngine(self.checkpoint_repo, step_delay=definition.step_delay,
+                                    resources=self.resources, **self.engine_options)
+            engine.configure(name, [resolve(ref) for ref in definition.steps], fuse=definition.fuse)
+            self._engines[name] = engine
+        return engine
+
+    async def prepare(self, name: str) -> WorkflowEngine:
+        """Like get, but import the workflow's step modules in the executor so the loop keeps running"""
+        if name not in self._engines and name in self.definitions:
+            await self._import(self.definitions[name].modules)
+        return self.get(name)
+
+    @staticmethod
+    def _import(modules: Iterable[str]) -> Awaitable:
+        loop = asyncio.get_event_loop()
+        return asyncio.gather(*(loop.run_in_executor(None, importlib.import_module, module)
+                                for module in modules))
+
+    async def warm_up(self, names: Optional[Iterable[str]] = None, import_steps: bool = False,
+                      connections: int = 1):
+        """Prepare for traffic in parallel: checkpoint schema, resource pools and, optionally, step imports"""
+        definitions = [self.definitions[name] for name in (names or self.definitions)]
+        tasks = []
+        initialize: Optional[Callable] = getattr(self.checkpoint_repo, 'initialize', None)
+        if initialize is not None:
+            tasks.append(initialize())
+        if self.resources is not None:
+            needed = {resource for definition in definitions for resource in definition.resources}
+            tasks += [self.resources.get(resource).warm_up(connections)
+                      for resource in needed if resource in self.resources]
+        if import_steps:
+            modules = set().union(*(definition.modules for definition in definitions))
+            tasks.append(self._import(modules))
+        await asyncio.gather(*tasks)
+        if import_steps:
+            for definition in definitions:
+                self.get(definition.name)
\ No newline at end of file
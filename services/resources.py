@@ -0,0 +1,162 @@
+import asyncio
+import inspect
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+class ResourceUnavailableError(Exception):
+    """Raised when a pooled resource cannot be acquired in time"""
+
+async def _maybe_await(value: Any) -> Any:
+    return await value if inspect.isawaitable(value) else value
+
+class ResourcePool:
+    """Pool of reusable async clients for one external system.
+
+    ``factory()`` opens a client. At most ``max_size`` clients are checked out
+    at once; idle clients are reused, and one idle for longer than
+    ``health_check_interval`` is verified with ``health_check(client)`` before
+    reuse. Clients whose caller failed with a connection error are discarded.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Awaitable[Any]], max_size: int = 10,
+                 close: Optional[Callable[[Any], Any]] = None,
+                 health_check: Optional[Callable[[Any], Awaitable[bool]]] = None,
+                 health_check_interval: float = 30.0, acquire_timeout: Optional[float] = None):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.name = name
+        self.factory = factory
+        self.max_size = max_size
+        self._close_client = close
+        self.health_check = health_check
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self._idle: Deque[Tuple[Any, float]] = deque()  # (client, last verified)
+        self._semaphore: Optional[asyncio.Semaphore] = None  # Created lazily on the running loop
+        self._closed = False
+        self.in_use = 0
+        self.counters: Dict[str, int] = {'created': 0, 'reused': 0, 'discarded': 0, 'unhealthy': 0}
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        if self._closed:
+            raise ResourceUnavailableError(f"Resource pool {self.name} is closed")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_size)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise ResourceUnavailableError(
+                f"No {self.name} client free within {self.acquire_timeout}s") from None
+        self.in_use += 1
+        client = None
+        try:
+            client = await self._checkout()
+            yield client
+        except (OSError, asyncio.TimeoutError, asyncio.CancelledError):
+            # The connection state is unknown (it may hold a half-read reply); never reuse it
+            if client is not None:
+                await self._discard(client)
+                client = None
+            raise
+        finally:
+            if client is not None:
+                await self._checkin(client)
+            self.in_use -= 1
+            self._semaphore.release()
+
+    async def _checkout(self) -> Any:
+        while self._idle:
+            client, verified = self._idle.pop()  # Most recently used first
+            if self.health_check and time.monotonic() - verified >= self.health_check_interval:
+                if not await self.health_check(client):
+                    self.counters['unhealthy'] += 1
+                    await self._discard(client)
+                    continue
+            self.counters['reused'] += 1
+            return client
+        client = await self.factory()
+        self.counters['created'] += 1
+        return client
+
+    async def _checkin(self, client: Any):
+        if self._closed:
+            await self._discard(client)
+        else:
+            self._idle.append((client, time.monotonic()))
+
+    async def _discard(self, client: Any):
+        self.counters['discarded'] += 1
+        if self._close_client:
+            try:
+                await _maybe_await(self._close_client(client))
+            except Exception:
+                pass
+
+    async def warm_up(self, count: int = 1):
+        """Open clients ahead of demand so the first calls skip connection setup"""
+        count = min(count, self.max_size) - len(self._idle)
+        if count > 0:
+            clients = await asyncio.gather(*(self.factory() for _ in range(count)))
+            self.counters['created'] += len(clients)
+            now = time.monotonic()
+            self._idle.extend((client, now) for client in clients)
+
+    async def close(self):
+        self._closed = True
+        while self._idle:
+            client, _ = self._idle.pop()
+            await self._discard(client)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, 'idle': len(self._idle), 'in_use': self.in_use,
+                'max_size': self.max_size}
+
+class ResourceRegistry:
+    """Named resource pools shared by every workflow run by an engine.
+
+    Steps reach it as ``context.resources``::
+
+        async with context.resources.acquire('payments') as client:
+            ...
+    """
+
+    def __init__(self):
+        self._pools: Dict[str, ResourcePool] = {}
+
+    def register(self, name: str, factory: Callable[[], Awaitable[Any]], **options) -> ResourcePool:
+        if name in self._pools:
+            raise ValueError(f"Resource {name} is already registered")
+        pool = ResourcePool(name, factory, **options)
+        self._pools[name] = pool
+        return pool
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._pools
+
+    def get(self, name: str) -> ResourcePool:
+        try:
+            return self._pools[name]
+        except KeyError:
+            raise KeyError(f"Unknown resource: {name}") from None
+
+    def acquire(self, name: str):
+        return self.get(name).acquire()
+
+    async def warm_up(self, count: int = 1):
+        await asyncio.gather(*(pool.warm_up(count) for pool in self._pools.values()))
+
+    async def close(self):
+        for pool in self._pools.values():
+            await pool.close()
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {name: pool.stats() for name, pool in self._pools.items()}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
\ No newline at end of file
@@ -0,0 +1,73 @@
+import copy
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, List, Optional
+
+def log_event(logger: Any, level: int, msg: str, *args, **fields):
+    """Log lazily: skip formatting when the level is disabled and attach fields as structured data"""
+    if logger is None:
+        return
+    is_enabled = getattr(logger, 'isEnabledFor', None)
+    if is_enabled is not None and not is_enabled(level):
+        return
+    if isinstance(logger, (logging.Logger, logging.LoggerAdapter)):
+        logger.log(level, msg, *args, extra={'fields': fields})
+    else:
+        getattr(logger, logging.getLevelName(level).lower())(msg % args if args else msg)
+
+class StructuredFormatter(logging.Formatter):
+    """Render records as one JSON object per line, including workflow fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        payload.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hand records to a bounded queue without doing handler I/O or blocking the caller"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge msg % args now, as QueueHandler does: the loop may mutate the arguments
+        # before the listener thread gets to the record. Rendering stays with the listener.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        fields = getattr(record, 'fields', None)
+        if fields is not None:
+            record.fields = dict(fields)
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def start_background_logging(logger: Optional[logging.Logger] = None,
+                             handlers: Optional[List[logging.Handler]] = None,
+                             maxsize: int = 10000) -> QueueListener:
+    """Move handler I/O for logger onto a background thread; call stop() on the result to flush"""
+    logger = logger or logging.getLogger()
+    if handlers is None:
+        handlers = list(logger.handlers)
+    for handler in handlers:  # Handlers not moved to the background keep running as before
+        logger.removeHandler(handler)
+
+    log_queue: queue.Queue = queue.Queue(maxsize)
+    logger.addHandler(NonBlockingQueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
\ No newline at end of file
@@ -0,0 +1,202 @@
+import asyncio
+import gzip
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+from domain.entities import Priority, WorkflowContext, WorkflowMessage
+from .events import WorkflowHandle
+from .message_queue import QueueFullError, WorkflowMessageQueue
+
+TERMINAL_EVENTS = ('completed', 'failed', 'deadline_dropped', 'shed', 'rejected')
+
+@dataclass
+class TrafficRecord:
+    offset: float  # Seconds since the first recorded message
+    priority: Priority
+    workflow_name: str
+    request: Optional[Dict[str, Any]] = None
+    timeout: Optional[float] = None  # Relative deadline, if the message carried one
+
+    def to_json(self) -> str:
+        record = {'t': round(self.offset, 6), 'p': self.priority.value, 'w': self.workflow_name}
+        if self.request is not None:
+            record['r'] = self.request
+        if self.timeout is not None:
+            record['d'] = round(self.timeout, 6)
+        return json.dumps(record, separators=(',', ':'), default=str)
+
+    @classmethod
+    def from_json(cls, line: str) -> 'TrafficRecord':
+        record = json.loads(line)
+        return cls(offset=record['t'], priority=Priority(record['p']), workflow_name=record['w'],
+                   request=record.get('r'), timeout=record.get('d'))
+
+    def to_message(self, logger: Any = None) -> WorkflowMessage:
+        context = WorkflowContext.create(request=dict(self.request or {}), logger=logger)
+        if self.timeout is not None:
+            return WorkflowMessage.with_timeout(self.timeout, priority=self.priority,
+                                                workflow_name=self.workflow_name, context=context)
+        return WorkflowMessage(priority=self.priority, workflow_name=self.workflow_name, context=context)
+
+class TrafficRecorder:
+    """Append every message offered to publish, admitted or not, to a gzip-compressed
+    JSON-lines file, timestamped at arrival.
+
+    Attach to a live queue with ``mq.recorder = TrafficRecorder(path)``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._started: Optional[float] = None
+        self.recorded = 0
+
+    def record(self, message: WorkflowMessage):
+        now = time.monotonic()
+        if self._started is None:
+            self._started = now
+        timeout = message.time_remaining(now)
+        record = TrafficRecord(now - self._started, message.priority, message.workflow_name,
+                               message.context.request, timeout)
+        self._file.write(record.to_json() + '\n')
+        self.recorded += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def load_traffic(path: str) -> List[TrafficRecord]:
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        return [TrafficRecord.from_json(line) for line in fh if line.strip()]
+
+def save_traffic(path: str, records: Sequence[TrafficRecord]):
+    with gzip.open(path, 'wt', encoding='utf-8') as fh:
+        for record in records:
+            fh.write(record.to_json() + '\n')
+
+@dataclass
+class WorkloadClass:
+    workflow_name: str
+    priority: Priority
+    weight: float
+    request: Dict[str, Any] = field(default_factory=dict)
+    timeout: Optional[float] = None
+
+DEFAULT_MIX = [
+    WorkloadClass('fraud-detection', Priority.HIGH, 0.10,
+                  {'total_amount': 5000, 'customer_history': {'avg_transaction': 100}}, timeout=0.2),
+    WorkloadClass('medical-diagnosis', Priority.HIGH, 0.05,
+                  {'patient_id': 'PAT_67890', 'symptoms': ['chest_pain']}),
+    WorkloadClass('order-processing', Priority.MEDIUM, 0.45,
+                  {'items': ['laptop', 'mouse'], 'total_amount': 1200}),
+    WorkloadClass('loan-processing', Priority.MEDIUM, 0.20,
+                  {'customer_id': 'CUST_12345', 'requested_amount': 250000}),
+    WorkloadClass('ml-pipeline', Priority.LOW, 0.20,
+                  {'dataset': 'customer_churn', 'algorithm': 'gradient_boosting'}),
+]
+
+def _pick(rng: random.Random, offset: float, mix: Sequence[WorkloadClass]) -> TrafficRecord:
+    workload = rng.choices(mix, weights=[w.weight for w in mix])[0]
+    return TrafficRecord(offset, workload.priority, workload.workflow_name,
+                         dict(workload.request), workload.timeout)
+
+def generate_poisson(rate: float, duration: float, mix: Sequence[WorkloadClass] = DEFAULT_MIX,
+                     seed: Optional[int] = None) -> List[TrafficRecord]:
+    """Poisson arrivals at rate messages/second for duration seconds"""
+    rng = random.Random(seed)
+    records, offset = [], 0.0
+    while True:
+        offset += rng.expovariate(rate)
+        if offset >= duration:
+            return records
+        records.append(_pick(rng, offset, mix))
+
+def generate_bursty(rate: float, duration: float, burst_rate: float, burst_length: float,
+                    period: float, mix: Sequence[WorkloadClass] = DEFAULT_MIX,
+                    seed: Optional[int] = None) -> List[TrafficRecord]:
+    """On/off arrivals: burst_rate for the first burst_length seconds of each period, rate otherwise"""
+    rng = random.Random(seed)
+    peak = max(rate, burst_rate)
+    records, offset = [], 0.0
+    while True:
+        # Thinning: draw at the peak rate and keep arrivals in proportion to the current rate
+        offset += rng.expovariate(peak)
+        if offset >= duration:
+            return records
+        current = burst_rate if offset % period < burst_length else rate
+        if rng.random() < current / peak:
+            records.append(_pick(rng, offset, mix))
+
+async def replay(mq: WorkflowMessageQueue, records: Sequence[TrafficRecord], speed: float = 1.0,
+                 logger: Any = None) -> int:
+    """Publish records at their recorded offsets divided by speed (open loop)"""
+    await _publish_records(mq, records, speed, logger)
+    return len(records)
+
+async def _publish_records(mq: WorkflowMessageQueue, records: Sequence[TrafficRecord], speed: float,
+                           logger: Any) -> List[WorkflowHandle]:
+    """Handles of the admitted messages; rejected ones are counted by the queue's metrics"""
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+    publishes = []
+    for record in records:
+        delay = record.offset / speed - (loop.time() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        publishes.append(asyncio.ensure_future(mq.publish(record.to_message(logger))))
+    results = await asyncio.gather(*publishes, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception) and not isinstance(result, QueueFullError):
+            raise result
+    return [result for result in results if isinstance(result, WorkflowHandle)]
+
+@dataclass
+class LoadReport:
+    published: int
+    elapsed: float
+    counts: Dict[str, int]
+    latency: Dict[str, Dict[str, float]]
+
+    @property
+    def throughput(self) -> float:
+        return self.counts.get('completed', 0) / self.elapsed if self.elapsed else 0.0
+
+    def format(self) -> str:
+        lines = [f"Published {self.published} messages in {self.elapsed:.2f}s - "
+                 f"throughput {self.throughput:.1f} completed/s",
+                 "  " + ", ".join(f"{event}={count}" for event, count in self.counts.items())]
+        for priority in Priority:
+            stats = self.latency.get(priority.name)
+            if stats:
+                lines.append(f"  {priority.name:<6} n={stats['count']:<6} "
+                             f"p50={stats['p50'] * 1000:8.1f}ms p95={stats['p95'] * 1000:8.1f}ms "
+                             f"p99={stats['p99'] * 1000:8.1f}ms")
+        return "\n".join(lines)
+
+def summarize(mq: WorkflowMessageQueue, published: int, elapsed: float) -> LoadReport:
+    counts = {event: mq.metrics.count(event) for event in TERMINAL_EVENTS}
+    latency = {}
+    for name, stats in mq.metrics.latency.items():
+        latency[name] = {'count': stats.count, 'p50': stats.quantile(0.5),
+                         'p95': stats.quantile(0.95), 'p99': stats.quantile(0.99)}
+    return LoadReport(published, elapsed, counts, latency)
+
+async def run_load(mq: WorkflowMessageQueue, records: Sequence[TrafficRecord], speed: float = 1.0,
+                   drain_timeout: float = 60.0, logger: Any = None) -> LoadReport:
+    """Replay records against mq, wait for every message to finish, and report"""
+    consumer_task = asyncio.create_task(mq.start_consumer())
+    started = time.monotonic()
+    handles = await _publish_records(mq, records, speed, logger)
+    if handles:
+        await asyncio.wait([handle.result for handle in handles], timeout=drain_timeout)
+    elapsed = time.monotonic() - started
+    mq.stop()
+    await consumer_task
+    return summarize(mq, len(records), elapsed)
\ No newline at end of file
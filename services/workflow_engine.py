@@ -1,34 +1,174 @@
 import asyncio
-from typing import List, Callable, Optional
+import inspect
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Callable, Mapping, Optional, Set, Tuple
 from domain.entities import WorkflowContext, WorkflowCheckpoint, WorkflowState
+from domain.persistent_map import WorkflowData
+from domain.steps import STREAM_OFFSETS_KEY, MapStep
 from domain.repositories import CheckpointRepository
+from .events import EventBus
+from .execution_plan import PlanUnit, compile_plan, plan_from
+from .metrics import HedgeStats, LatencyStats
+from .structured_logging import log_event
+
+if TYPE_CHECKING:  # Annotations only; profiling pulls in cProfile and friends
+    from .profiling import WorkflowProfiler
+    from .resources import ResourceRegistry
+
+HEDGE_MIN_SAMPLES = 20  # Runs observed before a step's latency quantile is trusted for hedging
+HEDGE_REFRESH = 16  # Unhedged samples between recomputations of a step's hedge delay
+HEDGE_HOLDOUT = 10  # Every Nth eligible run is left unhedged to keep measuring the true latency
+
+class _StreamEnd:
+    """Marker passed down a stream pipeline when a stage finishes or fails"""
+    __slots__ = ('error',)
+
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+class WorkflowYielded(Exception):
+    """Raised when a workflow pauses at a step boundary after a yield request"""
 
 class WorkflowEngine:
-    def __init__(self, checkpoint_repo: Optional[CheckpointRepository] = None, step_delay: float = 0.0):
+    def __init__(self, checkpoint_repo: Optional[CheckpointRepository] = None, step_delay: float = 0.0,
+                 profiler: Optional['WorkflowProfiler'] = None,
+                 resources: Optional['ResourceRegistry'] = None, hedging: bool = True):
         self.checkpoint_repo = checkpoint_repo
         self.steps: List[Callable] = []
+        self.plan: List[PlanUnit] = []
         self.name = ""
         self.step_delay = step_delay  # Configurable delay for testing vs production
+        self.profiler = profiler  # Opt-in; None means no profiling overhead
+        self.resources = resources  # Pooled clients injected into steps as context.resources
+        self.events: Optional[EventBus] = None  # Set by the queue to publish step progress
+        
+        # Latency statistics used for cost-aware preemption and deadline estimates
+        self.workflow_stats = LatencyStats()
+        self.step_stats: Dict[str, LatencyStats] = {}
+        self.hedging = hedging  # Hedge idempotent steps that declare a hedge_quantile
+        self.hedge_stats: Dict[str, HedgeStats] = {}
+        self._hedge_delays: Dict[str, Tuple[int, float]] = {}  # unit name -> (sample count, delay)
+        self._progress: Dict[str, Tuple[int, float]] = {}
+        self._yield_requests: Set[str] = set()
+        self._child_engines: Dict[str, 'WorkflowEngine'] = {}
+        self.keep_completed = False  # Map-step children leave a COMPLETED checkpoint instead of none
     
-    def configure(self, name: str, steps: List[Callable]):
+    def configure(self, name: str, steps: List[Callable], fuse: bool = True):
+        """Set the workflow steps and compile them into an execution plan.
+
+        Consecutive steps declared ``@step(cheap=True)`` are fused into one
+        checkpointed unit. Fusion is skipped when step_delay simulates latency,
+        since every step is then a potential preemption point.
+        """
         self.name = name
         self.steps = steps
+        self.plan = compile_plan(steps, fuse=fuse and self.step_delay == 0)
+        for unit in self.plan:
+            self.step_stats.setdefault(unit.name, LatencyStats())
     
-    async def execute(self, context: WorkflowContext, start_step: int = 0) -> WorkflowContext:
+    def _unit_estimate(self, unit: PlanUnit) -> Optional[float]:
+        stats = self.step_stats.get(unit.name)
+        return stats.ewma if stats else None
+    
+    def estimate_runtime(self, start_step: int = 0) -> float:
+        """Estimated seconds to run from start_step to the end; unseen steps count as zero"""
+        return sum(self._unit_estimate(unit) or 0.0 for unit in self.plan if unit.end > start_step)
+    
+    def estimate_remaining(self, workflow_id: str) -> Optional[float]:
+        """Estimated seconds until a running workflow finishes, or None if unknown"""
+        progress = self._progress.get(workflow_id)
+        if progress is None:
+            return None
+        index, step_started = progress
+        remaining = 0.0
+        for unit in self.plan:
+            if unit.end <= index:
+                continue
+            estimate = self._unit_estimate(unit)
+            if estimate is None:
+                return None
+            if unit.start <= index:
+                estimate = max(0.0, estimate - (time.monotonic() - step_started))
+            remaining += estimate
+        return remaining
+    
+    def request_yield(self, workflow_id: str) -> bool:
+        """Ask a running workflow to pause at its next step boundary"""
+        if workflow_id not in self._progress:
+            return False
+        self._yield_requests.add(workflow_id)
+        return True
+    
+    async def execute(self, context: WorkflowContext, start_step: int = 0,
+                      profile: bool = False) -> WorkflowContext:
         workflow_id = context.id
+        profiling = self.profiler is not None and self.profiler.should_profile(self.name, profile)
+        if context.resources is None:
+            context.resources = self.resources
         
         # Load checkpoint if resuming
         if self.checkpoint_repo and start_step == 0:
             checkpoint = await self.checkpoint_repo.load(workflow_id)
-            if checkpoint and checkpoint.state == WorkflowState.PAUSED:
+            if checkpoint and self._resumable(checkpoint):
                 start_step = checkpoint.current_step
                 context.data.update(checkpoint.context_data.get('data', {}))
-                if context.logger:
-                    context.logger.info(f"[{self.name}] Resuming from step {start_step}")
+                log_event(context.logger, logging.INFO, "[%s] Resuming from step %d",
+                          self.name, start_step, workflow=self.name, workflow_id=workflow_id,
+                          step=start_step)
         
         # Execute steps with checkpoints
-        for i in range(start_step, len(self.steps)):
-            step = self.steps[i]
+        run_started = time.monotonic()
+        try:
+            context = await self._run_steps(context, start_step, profiling)
+        finally:
+            self._progress.pop(workflow_id, None)
+            self._yield_requests.discard(workflow_id)
+        if start_step == 0:
+            self.workflow_stats.record(time.monotonic() - run_started)
+        
+        # Mark as completed
+        if self.checkpoint_repo and self.keep_completed:
+            # Shielded: a parent cancelled now must still see this child as done
+            await asyncio.shield(self.checkpoint_repo.save(WorkflowCheckpoint(
+                workflow_id=workflow_id,
+                current_step=len(self.steps),
+                state=WorkflowState.COMPLETED,
+                context_data={'data': self._snapshot(context), 'request': context.request},
+                metadata={'workflow': self.name}
+            )))
+        elif self.checkpoint_repo:
+            await self.checkpoint_repo.delete(workflow_id)
+        
+        return context
+    
+    @staticmethod
+    def _resumable(checkpoint: WorkflowCheckpoint) -> bool:
+        if checkpoint.state == WorkflowState.PAUSED:
+            return True
+        # A mid-stream checkpoint still holds consistent data and offsets when the
+        # process died before it could write a PAUSED one
+        return checkpoint.state == WorkflowState.RUNNING and 'stream_offsets' in checkpoint.metadata
+    
+    async def _run_steps(self, context: WorkflowContext, start_step: int,
+                         profiling: bool = False) -> WorkflowContext:
+        workflow_id = context.id
+        plan = self.plan if start_step == 0 else plan_from(self.plan, start_step)
+        for unit in plan:
+            i = unit.start
+            
+            # Pause cleanly at the step boundary if a yield was requested
+            if workflow_id in self._yield_requests:
+                self._yield_requests.discard(workflow_id)
+                if self.checkpoint_repo:
+                    await self.checkpoint_repo.save(WorkflowCheckpoint(
+                        workflow_id=workflow_id,
+                        current_step=i,
+                        state=WorkflowState.PAUSED,
+                        context_data={'data': self._snapshot(context), 'request': context.request},
+                        metadata={'yielded_before_step': unit.name}
+                    ))
+                raise WorkflowYielded(f"{self.name} yielded before step {i}")
             
             # Save checkpoint before step
             if self.checkpoint_repo:
@@ -36,30 +176,51 @@ class WorkflowEngine:
                     workflow_id=workflow_id,
                     current_step=i,
                     state=WorkflowState.RUNNING,
-                    context_data={'data': context.data, 'request': context.request},
-                    metadata={'step_name': step.__name__}
+                    context_data={'data': self._snapshot(context), 'request': context.request},
+                    metadata=unit.checkpoint_metadata
                 )
                 await self.checkpoint_repo.save(checkpoint)
             
             try:
                 # Execute step with realistic delay
-                if context.logger:
-                    context.logger.info(f"[{self.name}] Starting step {i}: {step.__name__}")
+                log_event(context.logger, logging.INFO, "[%s] Starting step %d: %s",
+                          self.name, i, unit.name, workflow=self.name,
+                          workflow_id=workflow_id, step=i, step_name=unit.name)
                 
-                context = await self._execute_step(step, context)
+                if self.events is not None:
+                    self.events.emit('step_started', self.name, workflow_id, i, unit.name)
+                step_started = time.monotonic()
+                self._progress[workflow_id] = (i, step_started)
+                if profiling:
+                    if self.step_delay > 0:  # Simulated latency stays out of the profile
+                        await asyncio.sleep(self.step_delay)
+                    context = await self.profiler.profile_step(
+                        lambda: self._execute_step(unit, context, delay=False),
+                        self.name, workflow_id, i, unit.name, context.logger
+                    )
+                else:
+                    context = await self._execute_step(unit, context)
+                elapsed = time.monotonic() - step_started
+                self.step_stats.setdefault(unit.name, LatencyStats()).record(elapsed)
+                self._progress[workflow_id] = (unit.end, time.monotonic())
                 
-                if context.logger:
-                    context.logger.info(f"[{self.name}] Completed step {i}: {step.__name__}")
+                log_event(context.logger, logging.INFO, "[%s] Completed step %d: %s",
+                          self.name, i, unit.name, workflow=self.name,
+                          workflow_id=workflow_id, step=i, step_name=unit.name,
+                          duration_ms=round(elapsed * 1000, 3))
+                if self.events is not None:
+                    self.events.emit('step_completed', self.name, workflow_id, i, unit.name,
+                                     duration_ms=round(elapsed * 1000, 3))
                     
             except asyncio.CancelledError:
                 # Save pause checkpoint
                 if self.checkpoint_repo:
                     pause_checkpoint = WorkflowCheckpoint(
                         workflow_id=workflow_id,
-                        current_step=i + 1,  # Next step to resume from
+                        current_step=i,  # Interrupted step has not completed; redo it
                         state=WorkflowState.PAUSED,
-                        context_data={'data': context.data, 'request': context.request},
-                        metadata={'paused_at_step': step.__name__}
+                        context_data={'data': self._snapshot(context), 'request': context.request},
+                        metadata={'paused_at_step': unit.name}
                     )
                     await self.checkpoint_repo.save(pause_checkpoint)
                 raise
@@ -69,20 +230,245 @@ class WorkflowEngine:
                         workflow_id=workflow_id,
                         current_step=i,
                         state=WorkflowState.FAILED,
-                        context_data={'data': context.data},
+                        context_data={'data': self._snapshot(context)},
                         metadata={'error': str(e)}
                     )
                     await self.checkpoint_repo.save(error_checkpoint)
                 raise e
         
-        # Mark as completed
-        if self.checkpoint_repo:
-            await self.checkpoint_repo.delete(workflow_id)
-        
         return context
     
-    async def _execute_step(self, step: Callable, context: WorkflowContext) -> WorkflowContext:
+    @staticmethod
+    def _snapshot(context: WorkflowContext) -> Mapping[str, Any]:
+        # O(1) immutable snapshot, safe to serialize in an executor thread while
+        # the next step keeps mutating context.data on the event loop
+        data = context.data
+        return data.snapshot() if isinstance(data, WorkflowData) else dict(data)
+    
+    async def _execute_step(self, step: Callable, context: WorkflowContext,
+                            delay: bool = True) -> WorkflowContext:
         # Configurable delay for testing vs production
-        if self.step_delay > 0:
+        if delay and self.step_delay > 0:
             await asyncio.sleep(self.step_delay)
-        return step(context)
\ No newline at end of file
+        if step.map_step is not None:
+            return await self._execute_map(step.map_step, context)
+        if step.stream_step is not None:
+            return await self._execute_stream(step, context)
+        if step.hedge_quantile is not None and self.hedging:
+            return await self._execute_hedgeable(step, context)
+        result = step(context)
+        if inspect.isawaitable(result):  # Async steps, e.g. ones calling external systems
+            result = await result
+        return result
+    
+    async def _execute_hedgeable(self, unit: PlanUnit, context: WorkflowContext) -> WorkflowContext:
+        """Run a hedgeable unit, hedged or as an unhedged control, and record its latency.
+        
+        The hedge delay is a quantile of unhedged runs only: a hedged run's latency is
+        cut short by the hedge, so feeding it back would push the delay ever lower.
+        """
+        stats = self.hedge_stats.setdefault(unit.name, HedgeStats())
+        hedge_after = self._hedge_delay(unit, stats)
+        started = time.monotonic()
+        if hedge_after is None or (stats.runs + stats.held_out) % HEDGE_HOLDOUT == HEDGE_HOLDOUT - 1:
+            if hedge_after is not None:
+                stats.held_out += 1
+            context = await unit(context)
+            stats.unhedged.record(time.monotonic() - started)
+            return context
+        context = await self._execute_hedged(unit, context, hedge_after, stats)
+        stats.latency.record(time.monotonic() - started)
+        return context
+    
+    def _hedge_delay(self, unit: PlanUnit, stats: HedgeStats) -> Optional[float]:
+        """Seconds after which a hedgeable unit gets a second attempt, once enough runs are seen"""
+        unhedged = stats.unhedged
+        if unhedged.count < HEDGE_MIN_SAMPLES:
+            return None
+        cached = self._hedge_delays.get(unit.name)
+        if cached is None or unhedged.count - cached[0] >= HEDGE_REFRESH:
+            # Sorting the latency window on every run would cost more than the hedge saves
+            quantile = unhedged.quantile(unit.hedge_quantile)
+            cached = (unhedged.count, max(unit.hedge_min_delay, quantile))
+            self._hedge_delays[unit.name] = cached
+        return cached[1]
+    
+    async def _execute_hedged(self, unit: PlanUnit, context: WorkflowContext,
+                              hedge_after: float, stats: HedgeStats) -> WorkflowContext:
+        """Run an idempotent step; if it outlives hedge_after, race a second attempt against it.
+        
+        Each attempt works on its own copy of the data; the first to succeed wins and
+        the other is cancelled.
+        """
+        stats.runs += 1
+        primary = asyncio.ensure_future(self._attempt(unit.steps[0], context))
+        attempts = [primary]
+        try:
+            done, pending = await asyncio.wait(attempts, timeout=hedge_after)
+            if not done:
+                stats.hedged += 1
+                attempts.append(asyncio.ensure_future(self._attempt(unit.steps[0], context)))
+                pending = set(attempts)
+            error = None
+            while True:
+                for attempt in attempts:
+                    if attempt in done and attempt.exception() is None:
+                        if attempt is not primary:
+                            stats.hedge_wins += 1
+                        context.data = attempt.result().data
+                        return context
+                    if attempt in done:
+                        error = error or attempt.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+    
+    @staticmethod
+    async def _attempt(step: Callable, context: WorkflowContext) -> WorkflowContext:
+        attempt = WorkflowContext(id=context.id, data=context.data.copy(), request=context.request,
+                                  logger=context.logger, resources=context.resources)
+        return await step(attempt)  # compile_plan only allows coroutine steps to be hedged
+    
+    def _child_engine(self, map_step: MapStep) -> 'WorkflowEngine':
+        engine = self._child_engines.get(map_step.name)
+        if engine is None:
+            engine = WorkflowEngine(self.checkpoint_repo, step_delay=self.step_delay,
+                                    resources=self.resources)
+            engine.configure(f"{self.name}/{map_step.name}", map_step.steps)
+            engine.keep_completed = True
+            self._child_engines[map_step.name] = engine
+        return engine
+    
+    async def _execute_map(self, map_step: MapStep, context: WorkflowContext) -> WorkflowContext:
+        """Run one child workflow per item with bounded concurrency, then reduce.
+
+        Finished children are recorded as COMPLETED checkpoints, so when the map
+        step is resumed only unfinished children run again.
+        """
+        engine = self._child_engine(map_step)
+        items = list(map_step.items(context))
+        results: List[Optional[Mapping[str, Any]]] = [None] * len(items)
+        pending = iter(enumerate(items))
+        
+        async def run_child(index: int, item: Any) -> Mapping[str, Any]:
+            child_id = f"{context.id}/{map_step.name}/{index}"
+            if self.checkpoint_repo:
+                checkpoint = await self.checkpoint_repo.load(child_id)
+                if checkpoint and checkpoint.state == WorkflowState.COMPLETED:
+                    return checkpoint.context_data.get('data', {})
+            request = dict(item) if isinstance(item, Mapping) else {'item': item}
+            child = WorkflowContext(id=child_id, data={}, request=request, logger=context.logger,
+                                    resources=context.resources)
+            child = await engine.execute(child)
+            return self._snapshot(child)
+        
+        async def worker():
+            # Workers share one iterator, so at most max_concurrency children (and their
+            # checkpoint lookups) are in flight however many items there are
+            for index, item in pending:
+                results[index] = await run_child(index, item)
+        
+        workers = [asyncio.ensure_future(worker())
+                   for _ in range(min(map_step.max_concurrency, len(items)))]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException as e:
+            # Stop siblings (they checkpoint themselves as PAUSED) before propagating
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if isinstance(e, Exception) and not isinstance(e, WorkflowYielded):
+                await self._delete_children(context, map_step, len(items))  # Failed steps are not resumed
+            raise
+        
+        context = map_step.reduce(context, [dict(result) for result in results])
+        await self._delete_children(context, map_step, len(items))
+        return context
+    
+    async def _delete_children(self, context: WorkflowContext, map_step: MapStep, count: int):
+        if self.checkpoint_repo:
+            for index in range(count):
+                await self.checkpoint_repo.delete(f"{context.id}/{map_step.name}/{index}")
+    
+    async def _execute_stream(self, unit: PlanUnit, context: WorkflowContext) -> WorkflowContext:
+        """Run a StreamStep as source -> stage tasks -> sink joined by bounded queues.
+        
+        Only ``buffer`` chunks wait between neighbouring stages, so memory stays flat
+        however long the stream is, and the sink sees the first chunk as soon as it
+        clears every stage.
+        """
+        stream = unit.stream_step
+        start = context.data.get(STREAM_OFFSETS_KEY, {}).get(stream.name, {}).get('sink', 0)
+        names = ['source'] + [stage.__name__ for stage in stream.stages]
+        offsets = {name: start for name in names}  # Absolute chunks produced per stage
+        queues = [asyncio.Queue(stream.buffer) for _ in names]
+        
+        async def pump_source():
+            try:
+                async for chunk in stream.source(context, start):
+                    await queues[0].put(chunk)
+                    offsets['source'] += 1
+                    await asyncio.sleep(0)  # Let downstream start on this chunk before reading ahead
+                await queues[0].put(_StreamEnd())
+            except Exception as e:
+                await queues[0].put(_StreamEnd(e))
+        
+        async def pump_stage(index: int, stage: Callable):
+            inbox, outbox = queues[index], queues[index + 1]
+            while True:
+                chunk = await inbox.get()
+                if isinstance(chunk, _StreamEnd):
+                    await outbox.put(chunk)
+                    return
+                try:
+                    result = stage(context, chunk)
+                    if inspect.isawaitable(result):
+                        result = await result
+                except Exception as e:
+                    await outbox.put(_StreamEnd(e))
+                    return
+                await outbox.put(result)
+                offsets[names[index + 1]] += 1
+                await asyncio.sleep(0)
+        
+        tasks = [asyncio.ensure_future(pump_source())]
+        tasks += [asyncio.ensure_future(pump_stage(index, stage)) for index, stage in enumerate(stream.stages)]
+        consumed = start
+        try:
+            while True:
+                chunk = await queues[-1].get()
+                if isinstance(chunk, _StreamEnd):
+                    if chunk.error is not None:
+                        raise chunk.error
+                    break
+                result = stream.sink(context, chunk)
+                if inspect.isawaitable(result):
+                    await result
+                consumed += 1
+                # Offsets live beside the data they describe, so every snapshot is consistent
+                progress = {**offsets, 'sink': consumed}
+                context.data[STREAM_OFFSETS_KEY] = {**context.data.get(STREAM_OFFSETS_KEY, {}),
+                                                    stream.name: progress}
+                if self.checkpoint_repo and (consumed - start) % stream.checkpoint_every == 0:
+                    await self.checkpoint_repo.save(WorkflowCheckpoint(
+                        workflow_id=context.id,
+                        current_step=unit.start,
+                        state=WorkflowState.RUNNING,
+                        context_data={'data': self._snapshot(context), 'request': context.request},
+                        metadata={'step_name': unit.name, 'stream_offsets': progress}
+                    ))
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        remaining = {name: progress for name, progress in context.data.get(STREAM_OFFSETS_KEY, {}).items()
+                     if name != stream.name}
+        if remaining:
+            context.data[STREAM_OFFSETS_KEY] = remaining
+        elif STREAM_OFFSETS_KEY in context.data:
+            del context.data[STREAM_OFFSETS_KEY]
+        return context
\ No newline at end of file
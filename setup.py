@@ -51,6 +51,9 @@ setup(
         "console_scripts": [
             "pycontext-demo=main_layered:main",
         ],
+        "pycontext.workflows": [
+            "builtin=application.definitions:WORKFLOWS",
+        ],
     },
     keywords="workflow, engine, priority, checkpoint, async, orchestration",
     project_urls={
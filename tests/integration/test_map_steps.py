@@ -0,0 +1,139 @@
+import pytest
+import asyncio
+from collections import Counter
+from domain.entities import WorkflowContext
+from domain.steps import MapStep
+from infrastructure.persistence import SQLiteCheckpointRepository
+from services.workflow_engine import WorkflowEngine
+from application.healthcare_workflows import cohort_screening_step
+
+processed = Counter()
+running = {'now': 0, 'peak': 0}
+
+async def square_item_step(context: WorkflowContext) -> WorkflowContext:
+    running['now'] += 1
+    running['peak'] = max(running['peak'], running['now'])
+    await asyncio.sleep(0.02)
+    running['now'] -= 1
+    return context
+
+def record_square_step(context: WorkflowContext) -> WorkflowContext:
+    item = context.request['item']
+    if item < 0:
+        raise ValueError("negative item")
+    processed[item] += 1
+    context.data['square'] = item * item
+    return context
+
+def sum_squares(context: WorkflowContext, results) -> WorkflowContext:
+    context.data['total'] = sum(result['square'] for result in results)
+    return context
+
+def make_engine(checkpoint_repo, step_delay: float = 0.0) -> WorkflowEngine:
+    engine = WorkflowEngine(checkpoint_repo, step_delay=step_delay)
+    engine.configure('squares', [MapStep(
+        name='square_items',
+        items=lambda context: context.request['numbers'],
+        steps=[square_item_step, record_square_step],
+        reduce=sum_squares,
+        max_concurrency=2,
+    )])
+    return engine
+
+@pytest.mark.asyncio
+async def test_map_step_fans_out_and_reduces(tmp_path):
+    """Test children run with bounded concurrency and are reduced in order."""
+    checkpoint_repo = SQLiteCheckpointRepository(str(tmp_path / "checkpoints.db"))
+    processed.clear()
+    running.update(now=0, peak=0)
+    engine = make_engine(checkpoint_repo, step_delay=0.02)
+
+    context = WorkflowContext.create(request={'numbers': [1, 2, 3, 4, 5]})
+    result = await engine.execute(context)
+
+    assert result.data['total'] == 55
+    assert processed == Counter({1: 1, 2: 1, 3: 1, 4: 1, 5: 1})
+    assert running['peak'] == 2  # Children overlap, but never beyond max_concurrency
+    assert await checkpoint_repo.load(f"{context.id}/square_items/0") is None
+
+@pytest.mark.asyncio
+async def test_resumed_map_step_redoes_only_unfinished_children(tmp_path):
+    """Test cancelling mid-map and resuming never reruns finished children."""
+    checkpoint_repo = SQLiteCheckpointRepository(str(tmp_path / "checkpoints.db"))
+    processed.clear()
+    engine = make_engine(checkpoint_repo, step_delay=0.05)
+    context = WorkflowContext.create(request={'numbers': list(range(6))})
+
+    task = asyncio.create_task(engine.execute(context))
+    while len(processed) < 2:  # First batch of children finished
+        await asyncio.sleep(0.005)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    finished = set(processed)
+    assert len(finished) < 6
+    result = await engine.execute(context)
+
+    assert result.data['total'] == sum(n * n for n in range(6))
+    assert all(count == 1 for count in processed.values())
+    assert set(processed) == set(range(6))
+
+class CountingRepository(SQLiteCheckpointRepository):
+    """Tracks how many checkpoint loads are in flight at once"""
+
+    def __init__(self, db_path: str):
+        super().__init__(db_path)
+        self.loading = 0
+        self.peak_loading = 0
+
+    async def load(self, workflow_id: str):
+        self.loading += 1
+        self.peak_loading = max(self.peak_loading, self.loading)
+        try:
+            return await super().load(workflow_id)
+        finally:
+            self.loading -= 1
+
+@pytest.mark.asyncio
+async def test_large_map_keeps_fan_out_bounded(tmp_path):
+    """Test a large collection never has more than max_concurrency children or lookups in flight."""
+    checkpoint_repo = CountingRepository(str(tmp_path / "checkpoints.db"))
+    running.update(now=0, peak=0)
+    engine = make_engine(checkpoint_repo)
+    context = WorkflowContext.create(request={'numbers': list(range(40))})
+
+    result = await engine.execute(context)
+
+    assert result.data['total'] == sum(n * n for n in range(40))
+    assert checkpoint_repo.peak_loading <= 2
+    assert running['peak'] <= 2
+
+@pytest.mark.asyncio
+async def test_failed_map_step_removes_child_checkpoints(tmp_path):
+    """Test child checkpoints are deleted when the map step fails instead of pausing."""
+    checkpoint_repo = SQLiteCheckpointRepository(str(tmp_path / "checkpoints.db"))
+    engine = make_engine(checkpoint_repo)
+    context = WorkflowContext.create(request={'numbers': [1, 2, 3, -1, 5]})
+
+    with pytest.raises(ValueError, match="negative item"):
+        await engine.execute(context)
+
+    for index in range(5):
+        assert await checkpoint_repo.load(f"{context.id}/square_items/{index}") is None
+
+@pytest.mark.asyncio
+async def test_cohort_screening_map_step():
+    """Test the clinical-trial cohort screening example screens each patient."""
+    engine = WorkflowEngine()
+    engine.configure('cohort-screening', [cohort_screening_step])
+    context = WorkflowContext.create(request={'patients': [
+        {'age': 40, 'conditions': ['diabetes']},
+        {'age': 90, 'conditions': ['diabetes']},
+        {'age': 30, 'conditions': []},
+    ]})
+
+    result = await engine.execute(context)
+
+    assert result.data['patients_screened'] == 3
+    assert result.data['patients_eligible'] == 1
@@ -0,0 +1,172 @@
+import pytest
+import asyncio
+import json
+from domain.entities import WorkflowContext
+from infrastructure.persistence import SQLiteCheckpointRepository
+from infrastructure.gateways import JsonLineClient
+from services.resources import ResourceRegistry, ResourceUnavailableError
+from services.workflow_engine import WorkflowEngine
+from application.ecommerce_workflows import inventory_check_step, payment_processing_step
+from application.financial_workflows import notification_dispatch_step
+from application.healthcare_workflows import prescription_generation_step
+
+class StandInGateway:
+    """Local JSON-lines server standing in for an external system"""
+
+    def __init__(self, call_delay: float = 0.0):
+        self.call_delay = call_delay
+        self.connections = 0
+        self.active_calls = 0
+        self.peak_calls = 0
+        self.effects = {}  # (op, idempotency_key) -> response of the call that took effect
+        self._writers = []
+
+    async def start(self) -> 'StandInGateway':
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def connect(self) -> JsonLineClient:
+        return await JsonLineClient.connect('127.0.0.1', self.port)
+
+    def drop_connections(self):
+        for writer in self._writers:
+            writer.close()
+
+    async def stop(self):
+        self.drop_connections()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.append(writer)
+        while line := await reader.readline():
+            request = json.loads(line)
+            response = {'ok': True}
+            if request['op'] == 'charge':
+                response['transaction_id'] = f"txn_{request['amount']}"
+            elif request['op'] == 'prescribe':
+                response['prescription_id'] = f"rx_{len(self.effects)}"
+            if request['op'] != 'ping':
+                key = request.get('idempotency_key') or f"call_{len(self.effects)}"
+                response = self.effects.setdefault((request['op'], key), response)
+            self.active_calls += 1
+            self.peak_calls = max(self.peak_calls, self.active_calls)
+            await asyncio.sleep(self.call_delay)
+            self.active_calls -= 1
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+        writer.close()
+
+@pytest.mark.asyncio
+async def test_pool_reuses_connections_and_limits_concurrency():
+    """Test clients are reused and at most max_size calls run at once."""
+    gateway = await StandInGateway(call_delay=0.01).start()
+    async with ResourceRegistry() as resources:
+        resources.register('payments', gateway.connect, max_size=3,
+                           close=JsonLineClient.close)
+
+        async def charge(amount):
+            async with resources.acquire('payments') as client:
+                return await client.call('charge', amount=amount)
+
+        results = await asyncio.gather(*(charge(n) for n in range(20)))
+
+        assert [r['transaction_id'] for r in results] == [f"txn_{n}" for n in range(20)]
+        assert gateway.connections == 3
+        assert gateway.peak_calls <= 3
+        stats = resources.snapshot()['payments']
+        assert stats['created'] == 3 and stats['reused'] == 17 and stats['in_use'] == 0
+    await gateway.stop()
+
+@pytest.mark.asyncio
+async def test_unhealthy_and_failed_connections_are_replaced():
+    """Test a dropped connection fails its health check and is reopened."""
+    gateway = await StandInGateway().start()
+    resources = ResourceRegistry()
+    pool = resources.register('payments', gateway.connect, max_size=1, close=JsonLineClient.close,
+                              health_check=JsonLineClient.ping, health_check_interval=0.0)
+
+    async with resources.acquire('payments') as client:
+        await client.call('charge', amount=1)
+    gateway.drop_connections()
+    await asyncio.sleep(0.01)
+    async with resources.acquire('payments') as client:
+        assert (await client.call('charge', amount=2))['transaction_id'] == 'txn_2'
+
+    assert pool.counters['unhealthy'] == 1
+    assert gateway.connections == 2
+
+    gateway.drop_connections()
+    pool.health_check_interval = 60.0  # Skip the check: the call itself hits the dead connection
+    with pytest.raises(OSError):
+        async with resources.acquire('payments') as client:
+            await client.call('charge', amount=3)
+    assert pool.stats()['idle'] == 0
+
+    await resources.close()
+    await gateway.stop()
+
+@pytest.mark.asyncio
+async def test_acquire_timeout_raises_when_pool_exhausted():
+    """Test acquire gives up after acquire_timeout when every client is busy."""
+    gateway = await StandInGateway().start()
+    resources = ResourceRegistry()
+    resources.register('payments', gateway.connect, max_size=1, acquire_timeout=0.01,
+                       close=JsonLineClient.close)
+
+    async with resources.acquire('payments'):
+        with pytest.raises(ResourceUnavailableError):
+            async with resources.acquire('payments'):
+                pass
+
+    await resources.close()
+    await gateway.stop()
+
+@pytest.mark.asyncio
+async def test_engine_injects_resources_into_steps():
+    """Test steps reach pooled clients through context.resources."""
+    gateway = await StandInGateway().start()
+    async with ResourceRegistry() as resources:
+        resources.register('payments', gateway.connect, close=JsonLineClient.close)
+        engine = WorkflowEngine(resources=resources)
+        engine.configure('order-processing', [inventory_check_step, payment_processing_step])
+
+        for _ in range(5):
+            context = WorkflowContext.create(request={'total_amount': 120, 'items': ['book']})
+            result = await engine.execute(context)
+            assert result.data['transaction_id'] == 'txn_120'
+
+        assert gateway.connections == 1
+    await gateway.stop()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('resource, op, side_effect_step', [
+    ('payments', 'charge', payment_processing_step),
+    ('pharmacy', 'prescribe', prescription_generation_step),
+    ('notifications', 'notify', notification_dispatch_step),
+])
+async def test_external_call_cancelled_mid_call_is_not_repeated_on_resume(
+        tmp_path, resource, op, side_effect_step):
+    """Test a step preempted during its gateway call takes effect once after resuming."""
+    gateway = await StandInGateway(call_delay=0.05).start()
+    async with ResourceRegistry() as resources:
+        resources.register(resource, gateway.connect, close=JsonLineClient.close)
+        engine = WorkflowEngine(SQLiteCheckpointRepository(str(tmp_path / "checkpoints.db")),
+                                resources=resources)
+        engine.configure('side-effects', [inventory_check_step, side_effect_step])
+        context = WorkflowContext.create(request={'total_amount': 120, 'items': ['book'],
+                                                  'customer_id': 'C1'})
+
+        task = asyncio.create_task(engine.execute(context))
+        while gateway.active_calls == 0:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        await engine.execute(context)
+
+        assert list(gateway.effects) == [(op, context.id)]
+    await gateway.stop()
\ No newline at end of file
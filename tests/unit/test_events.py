@@ -0,0 +1,137 @@
+import pytest
+import asyncio
+from domain.entities import WorkflowContext, WorkflowMessage, Priority
+from services.events import EventSubscription, WorkflowDroppedError, WorkflowEvent
+from services.message_queue import WorkflowMessageQueue, OverflowPolicy, QueueStoppedError
+from services.workflow_engine import WorkflowEngine
+
+def make_message(priority: Priority, name: str = 'events-workflow') -> WorkflowMessage:
+    return WorkflowMessage(priority=priority, workflow_name=name, context=WorkflowContext.create())
+
+def first_step(context: WorkflowContext) -> WorkflowContext:
+    context.data['first'] = True
+    return context
+
+def failing_step(context: WorkflowContext) -> WorkflowContext:
+    raise ValueError("boom")
+
+def make_queue(steps, **kwargs) -> WorkflowMessageQueue:
+    mq = WorkflowMessageQueue(**kwargs)
+    engine = WorkflowEngine(step_delay=0.01)
+    engine.configure('events-workflow', steps)
+    mq.register_workflow('events-workflow', engine)
+    return mq
+
+@pytest.mark.asyncio
+async def test_publish_handle_resolves_and_streams_progress():
+    """Test the publish handle yields step progress and resolves to the final context."""
+    mq = make_queue([first_step, first_step])
+    consumer_task = asyncio.create_task(mq.start_consumer())
+
+    handle = await mq.publish(make_message(Priority.MEDIUM))
+    kinds = [(event.kind, event.step) async for event in handle.events]
+    result = await handle
+
+    assert result.data['first'] is True
+    assert kinds == [('queued', None), ('started', None), ('step_started', 0), ('step_completed', 0),
+                     ('step_started', 1), ('step_completed', 1), ('completed', None)]
+    mq.stop()
+    await consumer_task
+
+@pytest.mark.asyncio
+async def test_subscription_filters_by_workflow_name():
+    """Test subscribers only see events of the workflow they subscribed to."""
+    mq = make_queue([first_step])
+    subscription = mq.subscribe('events-workflow')
+    other = mq.subscribe('other-workflow')
+    consumer_task = asyncio.create_task(mq.start_consumer())
+
+    handles = [await mq.publish(make_message(Priority.LOW)) for _ in range(2)]
+    await asyncio.gather(*handles)
+    mq.stop()
+    await consumer_task
+    mq.events.close()
+
+    events = [event async for event in subscription]
+    assert [event.kind for event in events].count('completed') == 2
+    assert {event.workflow_id for event in events} == {h.workflow_id for h in handles}
+    assert [event async for event in other] == []
+
+@pytest.mark.asyncio
+async def test_failed_and_shed_messages_raise_from_handle():
+    """Test handles surface step failures and shedding as exceptions."""
+    mq = make_queue([failing_step], max_size=1, overflow_policy=OverflowPolicy.SHED_OLDEST)
+    shed = await mq.publish(make_message(Priority.LOW))
+    failing = await mq.publish(make_message(Priority.LOW))
+
+    with pytest.raises(WorkflowDroppedError):
+        await shed
+
+    consumer_task = asyncio.create_task(mq.start_consumer())
+    with pytest.raises(ValueError, match="boom"):
+        await failing
+    mq.stop()
+    await consumer_task
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_buffer_is_bounded():
+    """Test a full subscriber buffer drops its oldest events instead of growing."""
+    subscription = EventSubscription(maxsize=2)
+    for step in range(5):
+        subscription.put(WorkflowEvent('step_started', 'wf', 'id', step=step))
+    subscription.close()
+
+    assert [event.step async for event in subscription] == [3, 4]
+    assert subscription.dropped == 3
+
+@pytest.mark.asyncio
+async def test_stop_settles_queued_handles_and_wakes_blocked_publishers():
+    """Test stopping fails handles of unrun messages and releases publishers waiting for space."""
+    mq = make_queue([first_step], max_size=2, overflow_policy=OverflowPolicy.BLOCK)
+    running = await mq.publish(make_message(Priority.LOW))
+    queued = await mq.publish(make_message(Priority.LOW))
+    consumer_task = asyncio.create_task(mq.start_consumer())
+    await asyncio.sleep(0)  # Consumer takes the first message
+    await mq.publish(make_message(Priority.LOW))
+    blocked = asyncio.create_task(mq.publish(make_message(Priority.LOW)))
+    await asyncio.sleep(0)
+
+    mq.stop()
+    await asyncio.wait_for(consumer_task, 1.0)
+
+    assert (await running).data['first'] is True  # The running workflow finishes
+    with pytest.raises(WorkflowDroppedError):
+        await asyncio.wait_for(queued, 1.0)
+    with pytest.raises(QueueStoppedError):
+        await asyncio.wait_for(blocked, 1.0)
+
+@pytest.mark.asyncio
+async def test_cancelled_consumer_fails_running_handle():
+    """Test cancelling the consumer task settles the running workflow's handle."""
+    mq = make_queue([first_step, first_step])
+    consumer_task = asyncio.create_task(mq.start_consumer())
+    handle = await mq.publish(make_message(Priority.LOW))
+    await asyncio.sleep(0.005)
+
+    consumer_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await consumer_task
+
+    with pytest.raises(WorkflowDroppedError):
+        await asyncio.wait_for(handle, 1.0)
+
+@pytest.mark.asyncio
+async def test_duplicate_publish_is_rejected_until_settled():
+    """Test a context cannot be published twice while its first handle is unsettled."""
+    mq = make_queue([first_step])
+    message = make_message(Priority.LOW)
+    handle = await mq.publish(message)
+
+    with pytest.raises(ValueError):
+        await mq.publish(message)
+    consumer_task = asyncio.create_task(mq.start_consumer())
+    await handle
+    second = await mq.publish(message)  # Allowed again once the first run settled
+    await second
+    mq.stop()
+    await consumer_task
\ No newline at end of file
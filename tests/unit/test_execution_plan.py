@@ -0,0 +1,67 @@
+import pytest
+from typing import Optional
+from domain.entities import WorkflowContext, WorkflowCheckpoint
+from domain.repositories import CheckpointRepository
+from domain.steps import step
+from services.execution_plan import compile_plan, plan_from
+from services.workflow_engine import WorkflowEngine
+
+class RecordingCheckpointRepository(CheckpointRepository):
+    def __init__(self):
+        self.saved = []
+
+    async def save(self, checkpoint: WorkflowCheckpoint) -> None:
+        self.saved.append(checkpoint)
+
+    async def load(self, workflow_id: str) -> Optional[WorkflowCheckpoint]:
+        return None
+
+    async def delete(self, workflow_id: str) -> None:
+        pass
+
+def expensive_step(context: WorkflowContext) -> WorkflowContext:
+    context.data['expensive'] = True
+    return context
+
+@step(cheap=True)
+def cheap_a(context: WorkflowContext) -> WorkflowContext:
+    context.data['a'] = True
+    return context
+
+@step(cheap=True)
+def cheap_b(context: WorkflowContext) -> WorkflowContext:
+    context.data['b'] = True
+    return context
+
+def test_compile_plan_fuses_consecutive_cheap_steps():
+    """Test only runs of cheap steps are fused and resume splits a fused unit."""
+    plan = compile_plan([expensive_step, cheap_a, cheap_b, expensive_step, cheap_a])
+
+    assert [unit.name for unit in plan] == [
+        'expensive_step', 'cheap_a+cheap_b', 'expensive_step', 'cheap_a'
+    ]
+    assert [(unit.start, unit.end) for unit in plan] == [(0, 1), (1, 3), (3, 4), (4, 5)]
+    assert len(compile_plan([cheap_a, cheap_b], fuse=False)) == 2
+
+    resumed = plan_from(plan, 2)
+    assert [(unit.start, unit.name) for unit in resumed] == [
+        (2, 'cheap_b'), (3, 'expensive_step'), (4, 'cheap_a')
+    ]
+
+@pytest.mark.asyncio
+async def test_fused_unit_checkpointed_once():
+    """Test the engine saves one checkpoint per plan unit."""
+    checkpoint_repo = RecordingCheckpointRepository()
+    engine = WorkflowEngine(checkpoint_repo)
+    engine.configure('fused-workflow', [expensive_step, cheap_a, cheap_b])
+
+    result = await engine.execute(WorkflowContext.create())
+
+    assert result.data == {'expensive': True, 'a': True, 'b': True}
+    assert [checkpoint.current_step for checkpoint in checkpoint_repo.saved] == [0, 1]
+    assert checkpoint_repo.saved[1].metadata == {'step_name': 'cheap_a+cheap_b'}
+
+    # Simulated step latency keeps every step as its own preemption point
+    engine = WorkflowEngine(step_delay=0.001)
+    engine.configure('delayed-workflow', [cheap_a, cheap_b])
+    assert len(engine.plan) == 2
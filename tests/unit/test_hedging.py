@@ -0,0 +1,124 @@
+import pytest
+import asyncio
+from collections import deque
+from domain.entities import WorkflowContext
+from domain.steps import StepSpec, step
+from services.workflow_engine import HEDGE_HOLDOUT, HEDGE_MIN_SAMPLES, WorkflowEngine
+
+class ScoringModel:
+    """Stand-in model whose call latencies are queued up by each test"""
+
+    def __init__(self):
+        self.delays = deque()
+        self.started = 0
+        self.cancelled = 0
+
+    def make_step(self):
+        @step(idempotent=True, hedge_quantile=0.95, hedge_min_delay=0.02)
+        async def scoring_step(context: WorkflowContext) -> WorkflowContext:
+            self.started += 1
+            delay = self.delays.popleft() if self.delays else 0.001
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            context.data['score'] = delay
+            return context
+        return scoring_step
+
+@pytest.fixture
+def model():
+    return ScoringModel()
+
+@pytest.fixture
+def engine(model):
+    engine = WorkflowEngine()
+    engine.configure('scoring', [model.make_step()])
+    return engine
+
+async def warm_up(engine: WorkflowEngine, model: ScoringModel):
+    for _ in range(HEDGE_MIN_SAMPLES):
+        await engine.execute(WorkflowContext.create())
+    model.started = model.cancelled = 0
+
+def test_only_idempotent_steps_can_be_hedged():
+    """Test hedging is refused for steps not declared idempotent."""
+    with pytest.raises(ValueError):
+        StepSpec(hedge_quantile=0.95)
+    with pytest.raises(ValueError):
+        StepSpec(idempotent=True, hedge_quantile=1.5)
+
+def test_only_coroutine_steps_can_be_hedged():
+    """Test sync steps are refused, since a losing attempt in a thread cannot be cancelled."""
+    @step(idempotent=True, hedge_quantile=0.95)
+    def blocking_scoring_step(context: WorkflowContext) -> WorkflowContext:
+        return context
+
+    with pytest.raises(ValueError, match="coroutine"):
+        WorkflowEngine().configure('scoring', [blocking_scoring_step])
+
+@pytest.mark.asyncio
+async def test_hedge_delay_excludes_step_delay(model):
+    """Test the hedge threshold is measured from after step_delay has elapsed."""
+    engine = WorkflowEngine(step_delay=0.05)
+    engine.configure('scoring', [model.make_step()])
+    model.delays.extend([0.03] * HEDGE_MIN_SAMPLES)
+    await warm_up(engine, model)
+
+    stats = engine.hedge_stats['scoring_step']
+    assert 0.03 <= engine._hedge_delay(engine.plan[0], stats) < 0.05
+
+@pytest.mark.asyncio
+async def test_straggler_is_hedged_and_loser_cancelled(engine, model):
+    """Test a run slower than the hedge quantile races a second attempt that wins."""
+    await warm_up(engine, model)
+    model.delays.extend([5.0, 0.001])  # Slow primary, fast hedge
+
+    result = await asyncio.wait_for(engine.execute(WorkflowContext.create()), timeout=1.0)
+
+    assert result.data['score'] == 0.001
+    assert (model.started, model.cancelled) == (2, 1)
+    stats = engine.hedge_stats['scoring_step']
+    assert stats.hedged == 1 and stats.hedge_wins == 1
+    assert stats.rate == 1 / stats.runs
+
+@pytest.mark.asyncio
+async def test_fast_runs_are_not_hedged(engine, model):
+    """Test runs finishing within the hedge delay start a single attempt."""
+    await warm_up(engine, model)
+
+    for _ in range(10):
+        await engine.execute(WorkflowContext.create())
+
+    assert model.started == 10
+    assert engine.hedge_stats['scoring_step'].hedged == 0
+
+@pytest.mark.asyncio
+async def test_primary_result_kept_when_it_finishes_first(engine, model):
+    """Test a hedged run keeps the primary's result when the primary wins the race."""
+    await warm_up(engine, model)
+    model.delays.extend([0.05, 5.0])  # Primary exceeds the hedge delay but still beats the hedge
+
+    result = await asyncio.wait_for(engine.execute(WorkflowContext.create()), timeout=1.0)
+
+    assert result.data['score'] == 0.05
+    stats = engine.hedge_stats['scoring_step']
+    assert stats.hedged == 1 and stats.hedge_wins == 0
+
+@pytest.mark.asyncio
+async def test_held_out_runs_report_tail_gain(engine, model):
+    """Test held-out runs stay unhedged, keeping the threshold and the p99 comparison honest."""
+    await warm_up(engine, model)
+    # Every run straggles on its first attempt; only hedged runs get a fast second one
+    for _ in range(HEDGE_HOLDOUT):
+        model.delays.extend([0.1, 0.001])
+    for _ in range(HEDGE_HOLDOUT):
+        await asyncio.wait_for(engine.execute(WorkflowContext.create()), timeout=1.0)
+
+    stats = engine.hedge_stats['scoring_step']
+    assert stats.held_out == 1 and stats.hedged == stats.runs == HEDGE_HOLDOUT - 1
+    assert stats.unhedged.count == HEDGE_MIN_SAMPLES + 1
+    assert stats.unhedged.quantile(0.99) >= 0.1
+    assert stats.tail_gain(0.99) == pytest.approx(stats.unhedged.quantile(0.99) - stats.latency.quantile(0.99))
+    assert stats.tail_gain(0.99) > 0.05
\ No newline at end of file
@@ -0,0 +1,201 @@
+import pytest
+import asyncio
+import time
+from domain.entities import WorkflowCheckpoint, WorkflowContext, WorkflowMessage, WorkflowState, Priority
+from infrastructure.persistence import SQLiteCheckpointRepository
+from services.message_queue import (
+    WorkflowMessageQueue, OverflowPolicy, QueueFullError, SchedulingPolicy, LatePolicy
+)
+from services.workflow_engine import WorkflowEngine
+
+def make_message(priority: Priority, name: str = 'test-workflow', **kwargs) -> WorkflowMessage:
+    return WorkflowMessage(priority=priority, workflow_name=name, context=WorkflowContext.create(), **kwargs)
+
+def record_step(context: WorkflowContext) -> WorkflowContext:
+    context.data['done'] = True
+    return context
+
+@pytest.mark.asyncio
+async def test_reject_when_priority_class_full():
+    """Test REJECT policy raises once a priority class reaches its capacity."""
+    mq = WorkflowMessageQueue(capacity={Priority.LOW: 2}, overflow_policy=OverflowPolicy.REJECT)
+
+    await mq.publish(make_message(Priority.LOW))
+    await mq.publish(make_message(Priority.LOW))
+    with pytest.raises(QueueFullError):
+        await mq.publish(make_message(Priority.LOW))
+
+    await mq.publish(make_message(Priority.MEDIUM))
+    assert mq.depth(Priority.LOW) == 2
+    assert mq.metrics.count('rejected', Priority.LOW) == 1
+
+@pytest.mark.asyncio
+async def test_high_priority_reserve():
+    """Test HIGH messages can use reserved headroom that other classes cannot."""
+    mq = WorkflowMessageQueue(max_size=3, high_priority_reserve=1,
+                              overflow_policy=OverflowPolicy.REJECT)
+
+    await mq.publish(make_message(Priority.LOW))
+    await mq.publish(make_message(Priority.MEDIUM))
+    with pytest.raises(QueueFullError):
+        await mq.publish(make_message(Priority.LOW))
+
+    await mq.publish(make_message(Priority.HIGH))
+    assert mq.depth() == 3
+
+@pytest.mark.asyncio
+async def test_shed_oldest_and_lowest():
+    """Test shedding policies drop the expected queued message."""
+    mq = WorkflowMessageQueue(max_size=2, overflow_policy=OverflowPolicy.SHED_OLDEST)
+    first = make_message(Priority.LOW, 'first')
+    await mq.publish(first)
+    await mq.publish(make_message(Priority.LOW, 'second'))
+    await mq.publish(make_message(Priority.LOW, 'third'))
+    names = sorted(entry[-1].workflow_name for entry in mq.queue)
+    assert names == ['second', 'third']
+
+    mq = WorkflowMessageQueue(max_size=2, overflow_policy=OverflowPolicy.SHED_LOWEST)
+    await mq.publish(make_message(Priority.MEDIUM, 'medium'))
+    await mq.publish(make_message(Priority.LOW, 'low'))
+    await mq.publish(make_message(Priority.HIGH, 'high'))
+    names = sorted(entry[-1].workflow_name for entry in mq.queue)
+    assert names == ['high', 'medium']
+    assert mq.metrics.count('shed', Priority.LOW) == 1
+
+    # Lower priority work never displaces more urgent messages
+    with pytest.raises(QueueFullError):
+        await mq.publish(make_message(Priority.LOW, 'late'))
+
+@pytest.mark.asyncio
+async def test_block_until_space_frees():
+    """Test BLOCK policy waits for the consumer and honours publish_timeout."""
+    mq = WorkflowMessageQueue(max_size=1, overflow_policy=OverflowPolicy.BLOCK)
+    await mq.publish(make_message(Priority.LOW))
+
+    blocked = asyncio.create_task(mq.publish(make_message(Priority.LOW)))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    mq._pop()
+    await mq._notify_space()
+    await asyncio.wait_for(blocked, 1.0)
+    assert mq.metrics.count('blocked', Priority.LOW) == 1
+
+    mq.publish_timeout = 0.01
+    with pytest.raises(QueueFullError):
+        await mq.publish(make_message(Priority.LOW))
+    assert mq.metrics.count('timed_out', Priority.LOW) == 1
+
+@pytest.mark.asyncio
+async def test_deadline_ordering():
+    """Test EDF ordering within and across priority classes."""
+    now = time.monotonic()
+    messages = [
+        make_message(Priority.LOW, 'low-urgent', deadline=now + 1),
+        make_message(Priority.HIGH, 'high-relaxed', deadline=now + 60),
+        make_message(Priority.HIGH, 'high-urgent', deadline=now + 5),
+        make_message(Priority.HIGH, 'high-none'),
+    ]
+
+    mq = WorkflowMessageQueue(scheduling=SchedulingPolicy.EDF_WITHIN_CLASS)
+    for message in messages:
+        await mq.publish(message)
+    order = [mq._pop().workflow_name for _ in messages]
+    assert order == ['high-urgent', 'high-relaxed', 'high-none', 'low-urgent']
+
+    mq = WorkflowMessageQueue(scheduling=SchedulingPolicy.EDF)
+    for message in messages:
+        await mq.publish(message)
+    order = [mq._pop().workflow_name for _ in messages]
+    assert order == ['low-urgent', 'high-urgent', 'high-relaxed', 'high-none']
+
+@pytest.mark.asyncio
+async def test_late_messages_dropped_and_counted():
+    """Test infeasible deadlines are dropped and met deadlines are recorded."""
+    mq = WorkflowMessageQueue(late_policy=LatePolicy.DROP)
+    engine = WorkflowEngine()
+    engine.configure('test-workflow', [record_step])
+    mq.register_workflow('test-workflow', engine)
+
+    expired = make_message(Priority.HIGH, deadline=time.monotonic() - 1)
+    on_time = WorkflowMessage.with_timeout(
+        5.0, priority=Priority.LOW, workflow_name='test-workflow', context=WorkflowContext.create()
+    )
+    await mq.publish(expired)
+    await mq.publish(on_time)
+
+    consumer_task = asyncio.create_task(mq.start_consumer())
+    await asyncio.sleep(0.05)
+    mq.stop()
+    await asyncio.wait_for(consumer_task, 1.0)
+
+    assert 'done' not in expired.context.data
+    assert on_time.context.data['done'] is True
+    assert mq.metrics.count('deadline_dropped', Priority.HIGH) == 1
+    assert mq.metrics.count('deadline_met', Priority.LOW) == 1
+
+    mq = WorkflowMessageQueue(late_policy=LatePolicy.FLAG)
+    late = make_message(Priority.HIGH, deadline=time.monotonic() - 1)
+    await mq.publish(late)
+    assert await mq._admit_deadline(mq._pop())
+    assert late.late
+
+@pytest.mark.asyncio
+async def test_preempted_message_deadline_counts_only_remaining_steps(tmp_path):
+    """Test a resumed message is judged on the steps after its checkpoint and dropped cleanly."""
+    def load_step(context): return context
+    def train_step(context): return context
+    def publish_step(context): return context
+
+    checkpoint_repo = SQLiteCheckpointRepository(str(tmp_path / "checkpoints.db"))
+    engine = WorkflowEngine(checkpoint_repo)
+    engine.configure('test-workflow', [load_step, train_step, publish_step])
+    for name, seconds in (('load_step', 1.0), ('train_step', 1.0), ('publish_step', 0.1)):
+        engine.step_stats[name].record(seconds)
+    mq = WorkflowMessageQueue(checkpoint_repo=checkpoint_repo, late_policy=LatePolicy.DROP)
+    mq.register_workflow('test-workflow', engine)
+
+    async def requeue_paused(deadline_in: float) -> WorkflowMessage:
+        message = make_message(Priority.LOW, deadline=time.monotonic() + deadline_in)
+        await checkpoint_repo.save(WorkflowCheckpoint(message.context.id, 2, WorkflowState.PAUSED,
+                                                      {'data': {}}, {}))
+        mq._paused.add(message.context.id)
+        return message
+
+    resumable = await requeue_paused(0.5)  # Too short for the workflow, enough for its last step
+    assert await mq._admit_deadline(resumable)
+    assert await checkpoint_repo.load(resumable.context.id) is not None
+
+    hopeless = await requeue_paused(0.05)
+    assert not await mq._admit_deadline(hopeless)
+    assert await checkpoint_repo.load(hopeless.context.id) is None
+    assert mq.metrics.count('deadline_dropped', Priority.LOW) == 1
+
+@pytest.mark.asyncio
+async def test_cost_aware_preemption():
+    """Test nearly finished work is not cancelled and costly work yields at a boundary."""
+    mq = WorkflowMessageQueue(preemptive=True, preemption_threshold=0.05,
+                              preempt_at_step_boundary=True)
+    engine = WorkflowEngine(step_delay=0.03)
+    engine.configure('test-workflow', [record_step, record_step, record_step])
+    mq.register_workflow('test-workflow', engine)
+    await engine.execute(WorkflowContext.create())  # Warm up step statistics
+
+    consumer_task = asyncio.create_task(mq.start_consumer())
+
+    # Three 30ms steps remaining: too costly to wait, so yield at the next boundary
+    await mq.publish(make_message(Priority.LOW))
+    await asyncio.sleep(0.01)
+    await mq.publish(make_message(Priority.HIGH))
+    assert mq.metrics.count('preemption_deferred', Priority.LOW) == 1
+
+    # Inside the final step: cheaper to finish than to preempt
+    await asyncio.sleep(0.3)
+    await mq.publish(make_message(Priority.LOW))
+    await asyncio.sleep(0.075)
+    await mq.publish(make_message(Priority.HIGH))
+    assert mq.metrics.count('preemption_skipped', Priority.LOW) == 1
+    assert mq.metrics.count('preempted') == 0
+
+    mq.stop()
+    await asyncio.wait_for(consumer_task, 1.0)
@@ -0,0 +1,79 @@
+import pytest
+import json
+import random
+from domain.entities import WorkflowContext, WorkflowCheckpoint
+from domain.persistent_map import PersistentMap, WorkflowData
+from infrastructure.persistence import SQLiteCheckpointRepository
+from services.workflow_engine import WorkflowEngine
+
+class CollidingKey:
+    """Key with a deliberately tiny hash space to exercise collision nodes."""
+
+    def __init__(self, value: int):
+        self.value = value
+
+    def __hash__(self):
+        return self.value % 3
+
+    def __eq__(self, other):
+        return isinstance(other, CollidingKey) and other.value == self.value
+
+def first_step(context: WorkflowContext) -> WorkflowContext:
+    context.data['first'] = 1
+    return context
+
+def second_step(context: WorkflowContext) -> WorkflowContext:
+    context.data['second'] = 2
+    return context
+
+def test_persistent_map_matches_dict_semantics():
+    """Test random set/delete sequences against a dict, including hash collisions."""
+    rng = random.Random(42)
+    keys = list(range(300)) + [f"key-{i}" for i in range(300)] + [CollidingKey(i) for i in range(30)]
+    expected = {}
+    current = PersistentMap()
+    for _ in range(5000):
+        key = rng.choice(keys)
+        if key in expected and rng.random() < 0.4:
+            del expected[key]
+            current = current.delete(key)
+        else:
+            expected[key] = rng.random()
+            current = current.set(key, expected[key])
+    assert len(current) == len(expected)
+    assert dict(current) == expected
+    assert all(current[key] == value for key, value in expected.items())
+    with pytest.raises(KeyError):
+        PersistentMap().delete('missing')
+
+def test_snapshots_are_isolated_from_later_writes():
+    """Test a snapshot is unaffected by mutations made after it was taken."""
+    data = WorkflowData({'a': 1})
+    snapshot = data.snapshot()
+    data['a'] = 2
+    data['b'] = 3
+    del data['a']
+
+    assert dict(snapshot) == {'a': 1}
+    assert data == {'b': 3}
+    assert data.copy() == data and data.copy() is not data
+
+@pytest.mark.asyncio
+async def test_checkpoints_capture_context_at_step_boundary(tmp_path):
+    """Test saved checkpoints hold the data as of their step, not later mutations."""
+    saved = []
+
+    class CapturingRepository(SQLiteCheckpointRepository):
+        async def save(self, checkpoint: WorkflowCheckpoint) -> None:
+            saved.append(checkpoint)
+            await super().save(checkpoint)
+
+    engine = WorkflowEngine(CapturingRepository(str(tmp_path / "checkpoints.db")))
+    engine.configure('snapshot-workflow', [first_step, second_step])
+    context = WorkflowContext.create(request={'id': 1})
+
+    await engine.execute(context)
+
+    assert dict(saved[0].context_data['data']) == {}
+    assert dict(saved[1].context_data['data']) == {'first': 1}
+    assert json.loads(json.dumps(dict(context.data))) == {'first': 1, 'second': 2}
@@ -0,0 +1,87 @@
+import pytest
+import asyncio
+import pstats
+from domain.entities import WorkflowContext
+from services.profiling import WorkflowProfiler
+from services.workflow_engine import WorkflowEngine
+
+def busy_step(context: WorkflowContext) -> WorkflowContext:
+    context.data['total'] = sum(i * i for i in range(200000))
+    return context
+
+def neighbour_work():
+    sum(i * i for i in range(20000))
+
+async def waiting_step(context: WorkflowContext) -> WorkflowContext:
+    await asyncio.sleep(0.05)
+    return context
+
+@pytest.mark.asyncio
+async def test_profiles_selected_workflow(tmp_path):
+    """Test a workflow selected by name writes per-step profiles and collapsed stacks."""
+    profiler = WorkflowProfiler(str(tmp_path), workflows=['profiled'], sample_interval=0.0005)
+    engine = WorkflowEngine(profiler=profiler)
+    engine.configure('profiled', [busy_step])
+    context = WorkflowContext.create()
+
+    await engine.execute(context)
+
+    directory = tmp_path / 'profiled' / context.id
+    stats = pstats.Stats(str(directory / '00_busy_step.prof'))
+    assert any(func[2] == 'busy_step' for func in stats.stats)
+    folded = (directory / '00_busy_step.folded').read_text()
+    assert 'busy_step' in folded
+
+@pytest.mark.asyncio
+async def test_profiling_off_unless_selected(tmp_path):
+    """Test unselected workflows are not profiled unless the message asks for it."""
+    profiler = WorkflowProfiler(str(tmp_path), workflows=['other'])
+    engine = WorkflowEngine(profiler=profiler)
+    engine.configure('quiet', [busy_step])
+
+    await engine.execute(WorkflowContext.create())
+    assert not (tmp_path / 'quiet').exists()
+
+    await engine.execute(WorkflowContext.create(), profile=True)
+    assert (tmp_path / 'quiet').exists()
+
+
+@pytest.mark.asyncio
+async def test_collapsed_stacks_exclude_other_tasks(tmp_path):
+    """Test work from other tasks running while an async step awaits is not sampled into it."""
+    profiler = WorkflowProfiler(str(tmp_path), workflows=['profiled'], sample_interval=0.0005)
+    engine = WorkflowEngine(profiler=profiler)
+    engine.configure('profiled', [waiting_step])
+    context = WorkflowContext.create()
+    finished = asyncio.Event()
+
+    async def neighbour():
+        while not finished.is_set():
+            neighbour_work()
+            await asyncio.sleep(0)
+
+    neighbour_task = asyncio.create_task(neighbour())
+    await engine.execute(context)
+    finished.set()
+    await neighbour_task
+
+    directory = tmp_path / 'profiled' / context.id
+    assert 'neighbour_work' not in (directory / '00_waiting_step.folded').read_text()
+    stats = pstats.Stats(str(directory / '00_waiting_step.prof'))
+    assert any(func[2] == 'neighbour_work' for func in stats.stats)  # cProfile sees the whole thread
+
+@pytest.mark.asyncio
+async def test_overlapping_profiled_workflows_all_complete(tmp_path):
+    """Test concurrently profiled workflows never fail; only one holds the profiler at a time."""
+    profiler = WorkflowProfiler(str(tmp_path), workflows=['profiled'])
+    engine = WorkflowEngine(profiler=profiler)
+    engine.configure('profiled', [waiting_step, busy_step])
+    contexts = [WorkflowContext.create() for _ in range(3)]
+
+    results = await asyncio.gather(*(engine.execute(context) for context in contexts))
+
+    assert all('total' in result.data for result in results)
+    written = list(tmp_path.glob('profiled/*/*.prof'))
+    assert written and len(written) + profiler.skipped == 2 * len(contexts)
+    for prof in written:
+        assert (prof.with_suffix('.folded')).exists()
\ No newline at end of file
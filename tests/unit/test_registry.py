@@ -0,0 +1,149 @@
+import pytest
+import asyncio
+import json
+import sqlite3
+import sys
+from importlib import metadata
+from domain.entities import WorkflowCheckpoint, WorkflowContext, WorkflowMessage, WorkflowState, Priority
+from infrastructure.persistence import SQLiteCheckpointRepository
+from services import registry as registry_module
+from services.message_queue import WorkflowMessageQueue
+from services.registry import WorkflowDefinition, WorkflowRegistry
+from services.resources import ResourceRegistry
+
+STEPS_MODULE = '''
+def greet_step(context):
+    context.data['greeting'] = 'hello ' + context.request.get('name', 'world')
+    return context
+'''
+
+@pytest.fixture
+def steps_module(tmp_path, monkeypatch):
+    (tmp_path / 'lazy_steps.py').write_text(STEPS_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield 'lazy_steps'
+    sys.modules.pop('lazy_steps', None)
+
+@pytest.mark.asyncio
+async def test_step_modules_are_imported_on_first_use(steps_module):
+    """Test the registry defers step imports until a workflow's first message runs."""
+    registry = WorkflowRegistry().load({'greeting': {'steps': [f'{steps_module}:greet_step']}})
+    mq = WorkflowMessageQueue(registry=registry)
+    assert steps_module not in sys.modules
+
+    consumer_task = asyncio.create_task(mq.start_consumer())
+    handle = await mq.publish(WorkflowMessage(priority=Priority.MEDIUM, workflow_name='greeting',
+                                              context=WorkflowContext.create(request={'name': 'ada'})))
+    result = await handle
+    mq.stop()
+    await consumer_task
+
+    assert result.data['greeting'] == 'hello ada'
+    assert steps_module in sys.modules
+    assert registry.is_loaded('greeting') and mq.engines['greeting'] is registry.get('greeting')
+
+@pytest.mark.asyncio
+async def test_first_use_imports_do_not_block_the_loop(tmp_path, monkeypatch):
+    """Test a slow-to-import step module loads off the event loop on first use."""
+    (tmp_path / 'slow_steps.py').write_text('import time\ntime.sleep(0.2)\n' + STEPS_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    registry = WorkflowRegistry().load({'greeting': {'steps': ['slow_steps:greet_step']}})
+    mq = WorkflowMessageQueue(registry=registry)
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(asyncio.get_event_loop().time())
+            await asyncio.sleep(0.01)
+
+    ticker_task = asyncio.create_task(ticker())
+    consumer_task = asyncio.create_task(mq.start_consumer())
+    handle = await mq.publish(WorkflowMessage(priority=Priority.MEDIUM, workflow_name='greeting',
+                                              context=WorkflowContext.create(request={})))
+    await handle
+    mq.stop()
+    await consumer_task
+    ticker_task.cancel()
+    sys.modules.pop('slow_steps', None)
+
+    assert max(later - earlier for earlier, later in zip(ticks, ticks[1:])) < 0.1
+
+@pytest.mark.asyncio
+async def test_unimportable_definition_fails_only_its_messages():
+    """Test a broken step reference fails its message without stopping the consumer."""
+    registry = WorkflowRegistry().load([WorkflowDefinition('broken', ['no_such_module:step'])])
+    mq = WorkflowMessageQueue(registry=registry)
+    consumer_task = asyncio.create_task(mq.start_consumer())
+
+    handle = await mq.publish(WorkflowMessage(priority=Priority.LOW, workflow_name='broken',
+                                              context=WorkflowContext.create()))
+    with pytest.raises(ImportError):
+        await handle
+    assert mq.running
+    mq.stop()
+    await consumer_task
+
+def test_definitions_from_config_file_and_entry_points(tmp_path, monkeypatch):
+    """Test definitions load from a JSON config file and from entry points."""
+    config = tmp_path / 'workflows.json'
+    config.write_text(json.dumps({'workflows': {
+        'greeting': {'steps': ['lazy_steps:greet_step'], 'step_delay': 0.5, 'resources': ['mail']}
+    }}))
+    registry = WorkflowRegistry().load_config(str(config))
+    assert registry.definitions['greeting'] == WorkflowDefinition(
+        'greeting', ['lazy_steps:greet_step'], resources=['mail'], step_delay=0.5)
+
+    class EntryPoint:
+        def load(self):
+            return {'from-plugin': {'steps': ['lazy_steps:greet_step']}}
+
+    class EntryPoints:
+        def select(self, group):
+            return [EntryPoint()] if group == registry_module.ENTRY_POINT_GROUP else []
+
+    monkeypatch.setattr(metadata, 'entry_points', EntryPoints)
+    assert registry.load_entry_points().names() == ['greeting', 'from-plugin']
+
+@pytest.mark.asyncio
+async def test_warm_up_prepares_schema_resources_and_steps(tmp_path, steps_module):
+    """Test warm-up creates the schema, opens needed pools and imports steps in parallel."""
+    db_path = str(tmp_path / 'checkpoints.db')
+    checkpoint_repo = SQLiteCheckpointRepository(db_path)
+    resources = ResourceRegistry()
+    opened = []
+
+    async def connect():
+        await asyncio.sleep(0.05)
+        opened.append(object())
+        return opened[-1]
+
+    resources.register('mail', connect, max_size=4)
+    resources.register('unused', connect)
+    registry = WorkflowRegistry(checkpoint_repo, resources).load(
+        {'greeting': {'steps': [f'{steps_module}:greet_step'], 'resources': ['mail']}})
+
+    with sqlite3.connect(db_path) as conn:  # Constructing the repository ran no DDL
+        assert conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall() == []
+
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+    await registry.warm_up(import_steps=True, connections=3)
+
+    assert loop.time() - started < 0.15  # Three 50ms connections opened concurrently
+    assert resources.get('mail').stats()['idle'] == 3
+    assert resources.get('unused').stats()['created'] == 0
+    assert registry.is_loaded('greeting')
+    with sqlite3.connect(db_path) as conn:
+        tables = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        assert tables == [('checkpoints',)]
+
+@pytest.mark.asyncio
+async def test_memory_repository_shares_one_database():
+    """Test ':memory:' checkpoints survive across the repository's connections."""
+    checkpoint_repo = SQLiteCheckpointRepository(":memory:")
+    await checkpoint_repo.save(WorkflowCheckpoint('wf-1', 2, WorkflowState.PAUSED, {'data': {}}, {}))
+
+    checkpoint = await checkpoint_repo.load('wf-1')
+
+    assert checkpoint.current_step == 2
+    assert await SQLiteCheckpointRepository(":memory:").load('wf-1') is None
\ No newline at end of file
@@ -0,0 +1,129 @@
+import pytest
+import asyncio
+from collections import Counter
+from domain.entities import WorkflowContext, WorkflowState
+from domain.steps import STREAM_OFFSETS_KEY, StreamStep
+from infrastructure.persistence import SQLiteCheckpointRepository
+from services.workflow_engine import WorkflowEngine
+
+CHUNKS = 40
+trace = {'sources': [], 'produced': 0, 'consumed': 0, 'peak_in_flight': 0, 'first_sink_at': None}
+sunk = Counter()
+
+async def numbers(context: WorkflowContext, offset: int):
+    trace['sources'].append(offset)
+    for index in range(offset, context.request.get('chunks', CHUNKS)):
+        trace['produced'] += 1
+        trace['peak_in_flight'] = max(trace['peak_in_flight'], trace['produced'] - trace['consumed'])
+        yield index
+
+def double(context: WorkflowContext, chunk: int) -> int:
+    return chunk * 2
+
+async def slow_increment(context: WorkflowContext, chunk: int) -> int:
+    await asyncio.sleep(context.request.get('stage_delay', 0))
+    if chunk == context.request.get('fail_at'):
+        raise ValueError("bad chunk")
+    return chunk + 1
+
+def total(context: WorkflowContext, chunk: int):
+    if trace['first_sink_at'] is None:
+        trace['first_sink_at'] = trace['produced']
+    trace['consumed'] += 1
+    sunk[chunk] += 1
+    context.data['total'] = context.data.get('total', 0) + chunk
+
+pipeline = StreamStep(name='sum_pipeline', source=numbers, stages=[double, slow_increment],
+                      sink=total, buffer=2, checkpoint_every=5)
+
+def reset():
+    trace.update(sources=[], produced=0, consumed=0, peak_in_flight=0, first_sink_at=None)
+    sunk.clear()
+
+def make_engine(checkpoint_repo=None) -> WorkflowEngine:
+    engine = WorkflowEngine(checkpoint_repo)
+    engine.configure('streaming', [pipeline])
+    return engine
+
+EXPECTED_TOTAL = sum(n * 2 + 1 for n in range(CHUNKS))
+
+@pytest.mark.asyncio
+async def test_stream_runs_with_bounded_buffers():
+    """Test chunks flow through concurrent stages with a bounded number in flight."""
+    reset()
+    result = await make_engine().execute(WorkflowContext.create(request={'stage_delay': 0.001}))
+
+    assert result.data['total'] == EXPECTED_TOTAL
+    assert STREAM_OFFSETS_KEY not in result.data
+    # Two queues of 2 per stage boundary plus one chunk held by each task
+    assert trace['peak_in_flight'] <= 3 * pipeline.buffer + 3
+    assert trace['first_sink_at'] < CHUNKS  # First result before the source is exhausted
+
+@pytest.mark.asyncio
+async def test_resumed_stream_continues_mid_stream(tmp_path):
+    """Test a cancelled stream resumes after the last chunk its sink consumed."""
+    checkpoint_repo = SQLiteCheckpointRepository(str(tmp_path / "checkpoints.db"))
+    engine = make_engine(checkpoint_repo)
+    context = WorkflowContext.create(request={'stage_delay': 0.005})
+    reset()
+
+    task = asyncio.create_task(engine.execute(context))
+    while trace['consumed'] < 10:
+        await asyncio.sleep(0.001)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    checkpoint = await checkpoint_repo.load(context.id)
+    offsets = checkpoint.context_data['data'][STREAM_OFFSETS_KEY]['sum_pipeline']
+    assert offsets['sink'] >= 10
+    assert offsets['source'] >= offsets['double'] >= offsets['slow_increment'] >= offsets['sink']
+
+    result = await engine.execute(context)
+
+    assert trace['sources'] == [0, offsets['sink']]
+    assert result.data['total'] == EXPECTED_TOTAL
+    assert set(sunk.values()) == {1}
+
+@pytest.mark.asyncio
+async def test_stage_failure_propagates():
+    """Test an exception in any stage fails the step instead of stalling the pipeline."""
+    reset()
+    context = WorkflowContext.create(request={'fail_at': 20})
+
+    with pytest.raises(ValueError, match="bad chunk"):
+        await asyncio.wait_for(make_engine().execute(context), timeout=1.0)
+
+class CrashingRepository(SQLiteCheckpointRepository):
+    """Loses PAUSED checkpoints, as if the process died before writing them"""
+
+    async def save(self, checkpoint):
+        if checkpoint.state != WorkflowState.PAUSED:
+            await super().save(checkpoint)
+
+@pytest.mark.asyncio
+async def test_stream_resumes_from_running_checkpoint_after_crash(tmp_path):
+    """Test a stream killed without a pause checkpoint resumes from its last mid-stream checkpoint."""
+    db_path = str(tmp_path / "checkpoints.db")
+    context = WorkflowContext.create(request={'stage_delay': 0.005})
+    reset()
+
+    task = asyncio.create_task(make_engine(CrashingRepository(db_path)).execute(context))
+    while trace['consumed'] < 12:
+        await asyncio.sleep(0.001)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    checkpoint_repo = SQLiteCheckpointRepository(db_path)
+    checkpoint = await checkpoint_repo.load(context.id)
+    assert checkpoint.state == WorkflowState.RUNNING
+    resume_at = checkpoint.metadata['stream_offsets']['sink']
+    assert resume_at >= 10 and resume_at % pipeline.checkpoint_every == 0
+
+    restarted = WorkflowContext(id=context.id, data={}, request=context.request)
+    result = await make_engine(checkpoint_repo).execute(restarted)
+
+    assert trace['sources'] == [0, resume_at]
+    assert result.data['total'] == EXPECTED_TOTAL
+    assert await checkpoint_repo.load(context.id) is None
\ No newline at end of file
@@ -0,0 +1,102 @@
+import pytest
+import json
+import logging
+from domain.entities import WorkflowContext
+from services.structured_logging import (
+    log_event, StructuredFormatter, NonBlockingQueueHandler, start_background_logging
+)
+from services.workflow_engine import WorkflowEngine
+
+class CountingArg:
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return 'arg'
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+def simple_step(context: WorkflowContext) -> WorkflowContext:
+    context.data['done'] = True
+    return context
+
+def make_logger(name: str, level: int) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    return logger
+
+def test_disabled_level_skips_formatting():
+    """Test nothing is formatted when the level is disabled."""
+    logger = make_logger('test.disabled', logging.WARNING)
+    handler = ListHandler()
+    logger.addHandler(handler)
+    arg = CountingArg()
+
+    log_event(logger, logging.INFO, "value %s", arg, workflow='w')
+    assert arg.formatted == 0
+    assert handler.lines == []
+
+    log_event(logger, logging.WARNING, "value %s", arg, workflow='w')
+    assert arg.formatted == 1
+
+@pytest.mark.asyncio
+async def test_engine_emits_structured_records_through_background_thread():
+    """Test engine records carry workflow fields and are written off the loop."""
+    logger = make_logger('test.structured', logging.INFO)
+    handler = ListHandler()
+    handler.setFormatter(StructuredFormatter())
+    logger.addHandler(handler)
+    listener = start_background_logging(logger)
+    assert isinstance(logger.handlers[0], NonBlockingQueueHandler)
+
+    engine = WorkflowEngine()
+    engine.configure('structured-workflow', [simple_step])
+    context = WorkflowContext.create(logger=logger)
+    await engine.execute(context)
+    listener.stop()
+
+    records = [json.loads(line) for line in handler.lines]
+    completed = records[-1]
+    assert completed['message'] == "[structured-workflow] Completed step 0: simple_step"
+    assert completed['workflow_id'] == context.id
+    assert completed['step_name'] == 'simple_step'
+    assert completed['duration_ms'] >= 0
+
+
+def test_background_records_keep_values_from_log_time():
+    """Test arguments mutated after logging still render with their values at log time."""
+    logger = make_logger('test.snapshot', logging.INFO)
+    handler = ListHandler()
+    logger.addHandler(handler)
+    listener = start_background_logging(logger)
+    progress = {'step': 1}
+
+    log_event(logger, logging.INFO, "progress %s", progress, workflow='w')
+    progress['step'] = 2
+    listener.stop()
+
+    assert handler.lines == ["progress {'step': 1}"]
+
+def test_explicit_handlers_leave_other_handlers_attached():
+    """Test only the handlers passed in are moved to the background thread."""
+    logger = make_logger('test.explicit', logging.INFO)
+    console, slow = ListHandler(), ListHandler()
+    logger.addHandler(console)
+    logger.addHandler(slow)
+
+    listener = start_background_logging(logger, handlers=[slow])
+    logger.info("hello")
+    listener.stop()
+
+    assert console in logger.handlers and slow not in logger.handlers
+    assert console.lines == slow.lines == ["hello"]
\ No newline at end of file
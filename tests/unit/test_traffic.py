@@ -0,0 +1,74 @@
+import pytest
+from domain.entities import WorkflowContext, WorkflowMessage, Priority
+from services.message_queue import OverflowPolicy, QueueFullError, WorkflowMessageQueue
+from services.traffic import (
+    TrafficRecorder, WorkloadClass, generate_bursty, generate_poisson, load_traffic, run_load
+)
+from services.workflow_engine import WorkflowEngine
+
+def simple_step(context: WorkflowContext) -> WorkflowContext:
+    context.data['done'] = True
+    return context
+
+@pytest.mark.asyncio
+async def test_record_and_load_round_trip(tmp_path):
+    """Test published messages are recorded with priority, request and timing."""
+    path = str(tmp_path / 'traffic.jsonl.gz')
+    mq = WorkflowMessageQueue()
+    with TrafficRecorder(path) as recorder:
+        mq.recorder = recorder
+        await mq.publish(WorkflowMessage(priority=Priority.LOW, workflow_name='a',
+                                         context=WorkflowContext.create(request={'x': 1})))
+        await mq.publish(WorkflowMessage.with_timeout(
+            0.5, priority=Priority.HIGH, workflow_name='b', context=WorkflowContext.create()
+        ))
+
+    records = load_traffic(path)
+    assert [(r.priority, r.workflow_name) for r in records] == [(Priority.LOW, 'a'), (Priority.HIGH, 'b')]
+    assert records[0].request == {'x': 1}
+    assert records[0].timeout is None
+    assert 0 < records[1].timeout <= 0.5
+    assert records[0].offset == 0 and records[1].offset >= 0
+
+@pytest.mark.asyncio
+async def test_rejected_messages_are_recorded(tmp_path):
+    """Test the recorder captures offered load, including messages the queue turned away."""
+    path = str(tmp_path / 'traffic.jsonl.gz')
+    mq = WorkflowMessageQueue(max_size=1, overflow_policy=OverflowPolicy.REJECT)
+    with TrafficRecorder(path) as recorder:
+        mq.recorder = recorder
+        await mq.publish(WorkflowMessage(priority=Priority.LOW, workflow_name='a',
+                                         context=WorkflowContext.create()))
+        with pytest.raises(QueueFullError):
+            await mq.publish(WorkflowMessage(priority=Priority.LOW, workflow_name='b',
+                                             context=WorkflowContext.create()))
+
+    assert [r.workflow_name for r in load_traffic(path)] == ['a', 'b']
+
+def test_synthetic_generators_are_seeded():
+    """Test Poisson and bursty generators are reproducible and roughly on rate."""
+    first = generate_poisson(100, 10, seed=7)
+    second = generate_poisson(100, 10, seed=7)
+    assert [r.offset for r in first] == [r.offset for r in second]
+    assert 800 < len(first) < 1200
+    assert all(0 <= r.offset < 10 for r in first)
+
+    bursty = generate_bursty(10, 10, burst_rate=200, burst_length=1, period=5, seed=7)
+    in_burst = sum(1 for r in bursty if r.offset % 5 < 1)
+    assert in_burst > 3 * (len(bursty) - in_burst)
+
+@pytest.mark.asyncio
+async def test_run_load_reports_per_priority_latency():
+    """Test accelerated replay drains the queue and reports latency percentiles."""
+    mq = WorkflowMessageQueue()
+    engine = WorkflowEngine()
+    engine.configure('simple', [simple_step])
+    mq.register_workflow('simple', engine)
+    mix = [WorkloadClass('simple', Priority.HIGH, 1), WorkloadClass('simple', Priority.LOW, 1)]
+
+    report = await run_load(mq, generate_poisson(200, 1, mix=mix, seed=3), speed=10)
+
+    assert report.counts['completed'] == report.published > 0
+    assert set(report.latency) == {'HIGH', 'LOW'}
+    assert report.latency['HIGH']['p50'] <= report.latency['HIGH']['p99']
+    assert 'throughput' in report.format()
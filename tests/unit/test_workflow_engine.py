@@ -0,0 +1,48 @@
+import pytest
+import asyncio
+from domain.entities import WorkflowContext
+from infrastructure.persistence import SQLiteCheckpointRepository
+from services.workflow_engine import WorkflowEngine, WorkflowYielded
+
+def first_step(context: WorkflowContext) -> WorkflowContext:
+    context.data['first'] = context.data.get('first', 0) + 1
+    return context
+
+def second_step(context: WorkflowContext) -> WorkflowContext:
+    context.data['second'] = context.data.get('second', 0) + 1
+    return context
+
+@pytest.mark.asyncio
+async def test_latency_statistics_and_estimates():
+    """Test per-step statistics feed runtime and remaining-time estimates."""
+    engine = WorkflowEngine(step_delay=0.02)
+    engine.configure('stats-workflow', [first_step, second_step])
+
+    await engine.execute(WorkflowContext.create())
+
+    assert engine.step_stats['first_step'].count == 1
+    assert engine.workflow_stats.count == 1
+    assert engine.estimate_runtime() >= 0.04
+    assert engine.estimate_runtime(start_step=1) < engine.estimate_runtime()
+    assert engine.estimate_remaining('not-running') is None
+
+@pytest.mark.asyncio
+async def test_yield_at_step_boundary_resumes_without_redoing_work(tmp_path):
+    """Test a yield request pauses before the next step and resumes there."""
+    checkpoint_repo = SQLiteCheckpointRepository(str(tmp_path / "checkpoints.db"))
+    engine = WorkflowEngine(checkpoint_repo, step_delay=0.05)
+    engine.configure('yield-workflow', [first_step, second_step])
+    context = WorkflowContext.create()
+
+    task = asyncio.create_task(engine.execute(context))
+    while not engine.request_yield(context.id):  # Wait until the first step is running
+        await asyncio.sleep(0.001)
+    with pytest.raises(WorkflowYielded):
+        await task
+
+    checkpoint = await checkpoint_repo.load(context.id)
+    assert checkpoint.current_step == 1
+
+    result = await engine.execute(context)
+    assert result.data == {'first': 1, 'second': 1}
+    assert await checkpoint_repo.load(context.id) is None